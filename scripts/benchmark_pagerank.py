@@ -0,0 +1,107 @@
+"""
+Compares the CSR PageRank engine with networkx on synthetic dependency graphs.
+
+Graphs are built the way DependencyGraph sees them (file -> imported files,
+with a preferential bias towards a few core modules), and both engines time
+graph construction and ranking separately. Scores must agree within --atol.
+
+Usage:
+    python scripts/benchmark_pagerank.py
+    python scripts/benchmark_pagerank.py --nodes 100000 --degree 5 --output pagerank.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.analysis.pagerank import CSRGraph, pagerank
+
+
+def make_graph(nodes: int, degree: int, seed: int = 0) -> Dict[str, List[str]]:
+    """Random import graph: each file imports ~`degree` earlier files, biased to low ids."""
+    rng = random.Random(seed)
+    names = [f"src/pkg_{i // 50}/mod_{i}.py" for i in range(nodes)]
+    edges = {}
+    for i, name in enumerate(names):
+        k = min(rng.randint(0, 2 * degree), i)
+        edges[name] = [names[int(i * rng.random() ** 2)] for _ in range(k)]
+    return edges
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run_networkx(files: List[str], edges: Dict[str, List[str]], tol: float) -> Dict[str, Any]:
+    import networkx as nx
+
+    def build():
+        G = nx.DiGraph()
+        G.add_nodes_from(files)
+        for f, targets in edges.items():
+            for target in targets:
+                G.add_edge(f, target)
+        return G
+
+    G, build_s = _timed(build)
+    ranks, rank_s = _timed(lambda: nx.pagerank(G, alpha=0.85, tol=tol))
+    return {"build_s": build_s, "rank_s": rank_s, "ranks": ranks}
+
+
+def run_csr(files: List[str], edges: Dict[str, List[str]], tol: float) -> Dict[str, Any]:
+    graph, build_s = _timed(lambda: CSRGraph.from_adjacency(files, edges))
+    ranks, rank_s = _timed(lambda: pagerank(graph, alpha=0.85, tol=tol))
+    return {"build_s": build_s, "rank_s": rank_s, "ranks": ranks, "edges": graph.num_edges}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSR PageRank against networkx.")
+    parser.add_argument("--nodes", type=int, action="append", help="Graph size (repeatable). Default: 1k, 10k, 100k")
+    parser.add_argument("--degree", type=int, default=4, help="Average imports per file")
+    parser.add_argument("--tol", type=float, default=1e-6)
+    parser.add_argument("--atol", type=float, default=1e-6, help="Max allowed per-node score difference")
+    parser.add_argument("--skip-networkx", action="store_true", help="Only time the CSR engine")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    ok = True
+    print(f"{'nodes':>8}{'edges':>10}{'engine':>10}{'build s':>10}{'rank s':>10}{'total s':>10}{'max diff':>12}")
+    for n in args.nodes or [1000, 10000, 100000]:
+        edges = make_graph(n, args.degree)
+        files = list(edges)
+        csr = run_csr(files, edges, args.tol)
+        row = {"nodes": n, "edges": csr["edges"], "csr": {k: csr[k] for k in ("build_s", "rank_s")}}
+        print(f"{n:>8}{csr['edges']:>10}{'csr':>10}{csr['build_s']:>10.3f}{csr['rank_s']:>10.3f}"
+              f"{csr['build_s'] + csr['rank_s']:>10.3f}{'':>12}")
+
+        if not args.skip_networkx:
+            ref = run_networkx(files, edges, args.tol)
+            diff = max(abs(csr["ranks"][f] - ref["ranks"][f]) for f in files)
+            ok = ok and diff <= args.atol
+            row["networkx"] = {k: ref[k] for k in ("build_s", "rank_s")}
+            row["max_diff"] = diff
+            row["speedup"] = (ref["build_s"] + ref["rank_s"]) / max(csr["build_s"] + csr["rank_s"], 1e-9)
+            print(f"{'':>8}{'':>10}{'networkx':>10}{ref['build_s']:>10.3f}{ref['rank_s']:>10.3f}"
+                  f"{ref['build_s'] + ref['rank_s']:>10.3f}{diff:>12.2e}  (x{row['speedup']:.1f})")
+        results.append(row)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"degree": args.degree, "tol": args.tol, "results": results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if not ok:
+        print(f"\nScores differ from networkx by more than {args.atol}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
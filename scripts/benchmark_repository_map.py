@@ -0,0 +1,385 @@
+"""
+Benchmarks ContextBuilder.build_repository_map on synthetic repositories.
+
+Each scenario generates a git repository with a configurable file count,
+language mix, file size and import density, then builds the repository map
+cold (empty analysis cache) and warm (cache from the cold run). Every run
+executes in a fresh subprocess so peak RSS is per run.
+
+Usage:
+    python scripts/benchmark_repository_map.py --preset medium
+    python scripts/benchmark_repository_map.py --files 5000 --mix py=0.6,ts=0.4 --imports 8
+    python scripts/benchmark_repository_map.py --preset small --compare bench_results/baseline.json
+"""
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRESETS = {
+    "small": {"files": 200, "functions": 8, "imports": 3, "mix": "py=0.5,js=0.3,go=0.2"},
+    "medium": {"files": 2000, "functions": 12, "imports": 5, "mix": "py=0.4,ts=0.3,js=0.1,go=0.1,java=0.1"},
+    "large": {"files": 10000, "functions": 12, "imports": 6, "mix": "py=0.3,ts=0.3,go=0.2,java=0.1,rs=0.1"},
+}
+
+# Phases reported in order (times from worker threads/processes are summed across workers)
+PHASES = ["collect", "screen", "imports", "graph", "pagerank", "parse", "symbols", "tokenize", "pack", "views", "total"]
+FILES_PER_DIR = 50
+
+
+# --- Synthetic repository generation ---
+
+def _module_name(i: int) -> str:
+    return f"mod_{i}"
+
+
+def _dir_of(i: int) -> str:
+    return f"pkg_{i // FILES_PER_DIR}"
+
+
+def _relative_import(src: int, dst: int) -> str:
+    if _dir_of(src) == _dir_of(dst):
+        return f"./{_module_name(dst)}"
+    return f"../{_dir_of(dst)}/{_module_name(dst)}"
+
+
+def _python_file(i: int, targets: List[int], functions: int) -> str:
+    lines = ['"""Synthetic module %d."""' % i]
+    lines += [f"from src.{_dir_of(t)}.{_module_name(t)} import func_0" for t in targets]
+    lines.append("")
+    for j in range(functions):
+        lines += [
+            f"def func_{j}(value, factor={j}):",
+            f'    """Computes step {j} of module {i}."""',
+            "    total = value * factor",
+            "    for k in range(3):",
+            "        total += k",
+            "    return total",
+            "",
+        ]
+    lines += [
+        f"class Service{i}:",
+        '    """Synthetic service."""',
+        "    def run(self):",
+        "        return func_0(1)",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def _js_file(i: int, targets: List[int], functions: int, typed: bool) -> str:
+    lines = [f"import {{ func_0 as dep_{t} }} from '{_relative_import(i, t)}';" for t in targets]
+    lines.append("")
+    arg = "value: number" if typed else "value"
+    for j in range(functions):
+        lines += [
+            f"/** Computes step {j} of module {i}. */",
+            f"export function func_{j}({arg}) {{",
+            f"  let total = value * {j};",
+            "  for (let k = 0; k < 3; k++) { total += k; }",
+            "  return total;",
+            "}",
+            "",
+        ]
+    lines += [f"export class Service{i} {{", "  run() { return func_0(1); }", "}", ""]
+    return "\n".join(lines)
+
+
+def _go_file(i: int, targets: List[int], functions: int) -> str:
+    lines = [f"package {_dir_of(i)}", "", "import ("]
+    lines += [f'\t"example.com/bench/{_dir_of(t)}"' for t in targets]
+    lines += [")", ""]
+    for j in range(functions):
+        lines += [
+            f"// Func{j}M{i} computes step {j}.",
+            f"func Func{j}M{i}(value int) int {{",
+            f"\ttotal := value * {j}",
+            "\tfor k := 0; k < 3; k++ {",
+            "\t\ttotal += k",
+            "\t}",
+            "\treturn total",
+            "}",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def _java_file(i: int, targets: List[int], functions: int) -> str:
+    lines = [f"package bench.{_dir_of(i)};", ""]
+    lines += [f"import bench.{_dir_of(t)}.Mod{t};" for t in targets]
+    lines += ["", f"public class Mod{i} {{"]
+    for j in range(functions):
+        lines += [
+            f"    /** Computes step {j}. */",
+            f"    public static int func{j}(int value) {{",
+            f"        int total = value * {j};",
+            "        for (int k = 0; k < 3; k++) { total += k; }",
+            "        return total;",
+            "    }",
+            "",
+        ]
+    lines += ["}", ""]
+    return "\n".join(lines)
+
+
+def _rust_file(i: int, targets: List[int], functions: int) -> str:
+    lines = [f"use crate::{_dir_of(t)}::{_module_name(t)};" for t in targets]
+    lines.append("")
+    for j in range(functions):
+        lines += [
+            f"/// Computes step {j}.",
+            f"pub fn func_{j}(value: i64) -> i64 {{",
+            f"    let mut total = value * {j};",
+            "    for k in 0..3 { total += k; }",
+            "    total",
+            "}",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+EXTENSIONS = {"py": ".py", "js": ".js", "ts": ".ts", "go": ".go", "java": ".java", "rs": ".rs"}
+
+
+def _render(lang: str, i: int, targets: List[int], functions: int) -> str:
+    if lang == "py":
+        return _python_file(i, targets, functions)
+    if lang in ("js", "ts"):
+        return _js_file(i, targets, functions, typed=lang == "ts")
+    if lang == "go":
+        return _go_file(i, targets, functions)
+    if lang == "java":
+        return _java_file(i, targets, functions)
+    return _rust_file(i, targets, functions)
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        lang, _, weight = part.partition("=")
+        lang = lang.strip()
+        if lang not in EXTENSIONS:
+            raise ValueError(f"Unknown language '{lang}' (choose from {', '.join(EXTENSIONS)})")
+        weights[lang] = float(weight or 1)
+    return weights
+
+
+def generate_repo(path: str, files: int, functions: int, imports: int, mix: str, seed: int = 0, git: bool = True):
+    """
+    Writes a synthetic repository to `path`. Imports point at earlier modules with
+    a preferential bias (like real code, a few modules are imported by many).
+    """
+    rng = random.Random(seed)
+    weights = parse_mix(mix)
+    langs = rng.choices(list(weights), weights=list(weights.values()), k=files)
+
+    os.makedirs(path, exist_ok=True)
+    for i, lang in enumerate(langs):
+        k = min(imports, i)
+        # Squaring biases targets towards low-numbered "core" modules
+        targets = sorted({int(i * rng.random() ** 2) for _ in range(k)})
+        directory = os.path.join(path, "src", _dir_of(i))
+        os.makedirs(directory, exist_ok=True)
+        file_name = f"Mod{i}.java" if lang == "java" else _module_name(i) + EXTENSIONS[lang]
+        with open(os.path.join(directory, file_name), "w", encoding="utf-8") as f:
+            f.write(_render(lang, i, targets, functions))
+
+    with open(os.path.join(path, "README.md"), "w", encoding="utf-8") as f:
+        f.write(f"# Benchmark repo\n\n{files} synthetic files ({mix}).\n")
+    with open(os.path.join(path, "requirements.txt"), "w", encoding="utf-8") as f:
+        f.write("requests\nnumpy\n")
+
+    if git:
+        env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+                   GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com")
+        for cmd in (["git", "init", "-q"], ["git", "add", "-A"], ["git", "commit", "-q", "-m", "bench"]):
+            subprocess.run(cmd, cwd=path, env=env, check=True, capture_output=True)
+
+
+# --- Measurement ---
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process and its (reaped) children, in MB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    # ru_maxrss is KB on Linux, bytes on macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / unit
+
+
+def run_once(repo: str, cache_dir: str, max_tokens: int, executor: str) -> Dict[str, Any]:
+    """Builds one repository map in this process and returns its measurements."""
+    os.environ["ANALYSIS_CACHE_DIR"] = cache_dir
+    sys.path.insert(0, ROOT)
+    from src.analysis.builder import ContextBuilder
+
+    builder = ContextBuilder(repo, executor=executor)
+    repo_map = builder.build_repository_map(max_tokens=max_tokens)
+    timings = builder.timings.as_dict()
+    return {
+        "timings": {phase: round(timings.get(phase, 0.0), 4) for phase in PHASES},
+        "parse_by_language": {
+            lang: {"files": s["files"], "seconds": round(s["seconds"], 4)} for lang, s in builder.parse_stats.items()
+        },
+        "files": repo_map.total_files,
+        "files_in_map": len(repo_map.files),
+        "tokens": repo_map.total_tokens,
+        "view_tokens": {name: view.total_tokens for name, view in repo_map.views.items()},
+        "files_per_sec": round(repo_map.total_files / max(timings.get("total", 0.0), 1e-9), 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def run_isolated(repo: str, cache_dir: str, max_tokens: int, executor: str) -> Dict[str, Any]:
+    """Runs `run_once` in a fresh interpreter so imports, caches and peak RSS don't leak between runs."""
+    args = [sys.executable, os.path.abspath(__file__), "--run-once", repo,
+            "--cache-dir", cache_dir, "--max-tokens", str(max_tokens), "--executor", executor]
+    result = subprocess.run(args, capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _median_run(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    median = dict(runs[0])
+    median["timings"] = {p: round(statistics.median(r["timings"][p] for r in runs), 4) for p in PHASES}
+    median["files_per_sec"] = round(statistics.median(r["files_per_sec"] for r in runs), 1)
+    median["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+    return median
+
+
+def run_scenario(name: str, params: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    work = tempfile.mkdtemp(prefix="bench_repo_")
+    repo = os.path.join(work, "repo")
+    try:
+        start = time.perf_counter()
+        generate_repo(repo, params["files"], params["functions"], params["imports"], params["mix"], seed=args.seed)
+        print(f"[{name}] generated {params['files']} files in {time.perf_counter() - start:.1f}s")
+
+        cold = []
+        for i in range(args.repeat):
+            cache_dir = os.path.join(work, f"cache_cold_{i}")
+            cold.append(run_isolated(repo, cache_dir, args.max_tokens, args.executor))
+        # Warm: reuses the last cold run's cache (skeletons, screening verdicts, graph cache)
+        warm = run_isolated(repo, cache_dir, args.max_tokens, args.executor)
+        return {"name": name, "params": params, "cold": _median_run(cold), "warm": warm, "cold_runs": cold}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# --- Reporting ---
+
+def print_report(results: Dict[str, Any]):
+    header = f"{'scenario':<12}{'run':<6}" + "".join(f"{p:>10}" for p in PHASES) + f"{'files/s':>10}{'RSS MB':>9}"
+    print("\n" + header)
+    print("-" * len(header))
+    for scenario in results["scenarios"]:
+        for run in ("cold", "warm"):
+            data = scenario[run]
+            row = f"{scenario['name']:<12}{run:<6}" + "".join(f"{data['timings'][p]:>10.3f}" for p in PHASES)
+            print(row + f"{data['files_per_sec']:>10.0f}{data['peak_rss_mb']:>9.0f}")
+    print("\nTimes in seconds; parse/tokenize are summed across workers.")
+
+
+def compare(results: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Prints per-phase ratios against a baseline file. Returns False on a regression."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {s["name"]: s for s in json.load(f)["scenarios"]}
+
+    ok = True
+    print(f"\nCompared with {baseline_path} (regression threshold {threshold:.0%}):")
+    for scenario in results["scenarios"]:
+        base = baseline.get(scenario["name"])
+        if not base:
+            continue
+        for run in ("cold", "warm"):
+            ratios = []
+            for phase in PHASES:
+                old, new = base[run]["timings"].get(phase, 0.0), scenario[run]["timings"][phase]
+                if old > 0.01:
+                    ratios.append(f"{phase} x{new / old:.2f}")
+            old_total, new_total = base[run]["timings"]["total"], scenario[run]["timings"]["total"]
+            regressed = old_total > 0 and new_total > old_total * (1 + threshold)
+            ok = ok and not regressed
+            flag = "REGRESSION" if regressed else "ok"
+            print(f"  {scenario['name']} {run}: {flag} | " + ", ".join(ratios))
+    return ok
+
+
+def _git_commit() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark build_repository_map on synthetic repositories.")
+    parser.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                        help="Scenario preset (repeatable). Default: small and medium")
+    parser.add_argument("--files", type=int, help="Custom scenario: number of source files")
+    parser.add_argument("--functions", type=int, default=10, help="Custom scenario: functions per file (file size)")
+    parser.add_argument("--imports", type=int, default=4, help="Custom scenario: imports per file (import density)")
+    parser.add_argument("--mix", default="py=0.5,ts=0.3,go=0.2", help="Custom scenario: language weights")
+    parser.add_argument("--max-tokens", type=int, default=128000)
+    parser.add_argument("--executor", choices=["auto", "thread", "process"], default="auto")
+    parser.add_argument("--repeat", type=int, default=3, help="Cold runs per scenario (median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results JSON path (default: bench_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown of total time vs baseline")
+    # Internal: single measured run in a fresh process
+    parser.add_argument("--run-once", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_once:
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(run_once(args.run_once, args.cache_dir, args.max_tokens, args.executor)))
+        return
+
+    scenarios = []
+    if args.files:
+        scenarios.append(("custom", {"files": args.files, "functions": args.functions,
+                                     "imports": args.imports, "mix": args.mix}))
+    for preset in args.preset or ([] if args.files else ["small", "medium"]):
+        scenarios.append((preset, PRESETS[preset]))
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "executor": args.executor,
+        "max_tokens": args.max_tokens,
+        "scenarios": [run_scenario(name, params, args) for name, params in scenarios],
+    }
+    print_report(results)
+
+    output = args.output or os.path.join(ROOT, "bench_results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
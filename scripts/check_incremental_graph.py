@@ -0,0 +1,137 @@
+"""
+Checks that incremental dependency-graph builds (from the SQLite graph cache)
+give the same edges as cold builds.
+
+Each scenario writes a small repository, builds the graph once to fill the
+cache, applies an edit (files added, changed or removed), then compares the
+warm incremental build against a cold build of the edited tree.
+
+Usage:
+    python scripts/check_incremental_graph.py
+"""
+import os
+import sys
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.analysis.graph import DependencyGraph
+from src.analysis.graph_cache import GraphCache
+from src.utils import git_blob_id
+
+# name -> (files before, edit: path -> new content, or None to delete)
+SCENARIOS = {
+    # A from-import names a symbol ("pkg.extra.extra_fn"), resolved to the
+    # package until the module exists
+    "python-add-module": (
+        {
+            "src/a.py": "from src.pkg.extra import extra_fn\n",
+            "src/pkg/__init__.py": "",
+        },
+        {"src/pkg/extra.py": "def extra_fn():\n    pass\n"},
+    ),
+    "python-remove-module": (
+        {
+            "src/a.py": "from src.pkg.extra import extra_fn\n",
+            "src/pkg/__init__.py": "",
+            "src/pkg/extra.py": "def extra_fn():\n    pass\n",
+        },
+        {"src/pkg/extra.py": None},
+    ),
+    # `use package::extra::f` names a function inside the new module
+    "rust-add-module": (
+        {
+            "src/main.rs": "mod package;\nuse package::extra::f;\n",
+            "src/package/mod.rs": "pub fn g() {}\n",
+        },
+        {"src/package/extra.rs": "pub fn f() {}\n"},
+    ),
+    # Same, declared from a crate root elsewhere (no `mod` line to match)
+    "rust-add-module-crate-path": (
+        {
+            "src/main.rs": "use crate::package::extra::f;\n",
+            "src/package/mod.rs": "pub fn g() {}\n",
+        },
+        {"src/package/extra.rs": "pub fn f() {}\n"},
+    ),
+    "js-add-index": (
+        {"src/app.ts": "import { x } from './lib/util';\n"},
+        {"src/lib/util/index.ts": "export const x = 1;\n"},
+    ),
+    "c-add-header": (
+        {"src/main.c": '#include "util.h"\n'},
+        {"src/util.h": "int util(void);\n"},
+    ),
+}
+
+
+def _write(root: str, files: Dict[str, Optional[str]]):
+    for rel, content in files.items():
+        path = os.path.join(root, rel)
+        if content is None:
+            os.remove(path)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _files(root: str) -> List[str]:
+    found = []
+    for base, _, names in os.walk(root):
+        found.extend(os.path.join(base, n) for n in names)
+    return sorted(found)
+
+
+def _edges(root: str, cache: Optional[GraphCache]) -> Dict[str, List[str]]:
+    files = _files(root)
+    graph = DependencyGraph(root, cache=cache)
+    blobs = None
+    if cache:
+        blobs = {}
+        for f in files:
+            with open(f, "rb") as fh:
+                blobs[f] = git_blob_id(fh.read())
+    graph.build_and_rank(files, blobs=blobs)
+    rel = lambda p: os.path.relpath(p, root).replace(os.sep, "/")
+    return {rel(f): sorted(rel(t) for t in graph.edges.get(f, [])) for f in files}
+
+
+def run_scenario(name: str, before: Dict[str, str], edit: Dict[str, Optional[str]]) -> bool:
+    work = tempfile.mkdtemp(prefix=f"graph-{name}-")
+    try:
+        repo = os.path.join(work, "repo")
+        db_path = os.path.join(work, "graph.sqlite")
+        _write(repo, before)
+        cache = GraphCache(db_path, repo, version=DependencyGraph.VERSION)
+        _edges(repo, cache)
+        cache.close()
+
+        _write(repo, edit)
+        cache = GraphCache(db_path, repo, version=DependencyGraph.VERSION)
+        warm = _edges(repo, cache)
+        cache.close()
+        cold = _edges(repo, None)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if warm == cold:
+        print(f"ok    {name}")
+        return True
+    print(f"FAIL  {name}")
+    for f in sorted(set(warm) | set(cold)):
+        if warm.get(f) != cold.get(f):
+            print(f"      {f}: warm {warm.get(f)} != cold {cold.get(f)}")
+    return False
+
+
+def main() -> int:
+    results = [run_scenario(name, before, edit) for name, (before, edit) in SCENARIOS.items()]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
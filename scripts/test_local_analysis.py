@@ -13,11 +13,12 @@ def test_analysis():
     try:
         builder = ContextBuilder(root_dir)
         repo_map = builder.build_repository_map()
+        repo_text = repo_map.render()
         
         print("\n--- REPOSITORY MAP GENERATED ---")
-        print(f"Length: {len(repo_map)} chars")
+        print(f"Length: {len(repo_text)} chars, {repo_map.total_tokens} tokens")
         print("First 500 chars:")
-        print(repo_map[:500])
+        print(repo_text[:500])
         print("\nTest Passed!")
         
     except Exception as e:
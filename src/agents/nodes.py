@@ -1,7 +1,7 @@
 import json
 import logging
-from typing import Any, Dict
-from langchain_core.messages import SystemMessage, HumanMessage
+from typing import Any, Dict, List, Tuple
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 
@@ -10,36 +10,113 @@ from src.core.config import config
 from src.core.memory import memory  # Import persistent memory
 from src.tools.badges import generate_badges
 from src.agents.prompts import (
-    ARCHITECT_PROMPT, WRITER_PROMPT, VISUALIZER_PROMPT, REVIEWER_PROMPT, ENGINEERING_INSIGHTS_PROMPT
+    ARCHITECT_PROMPT, WRITER_PROMPT, VISUALIZER_PROMPT, REVIEWER_PROMPT, ENGINEERING_INSIGHTS_PROMPT,
+    REPOSITORY_CONTEXT_PREAMBLE, REPOSITORY_CONTEXT_END
 )
 
 from src.core.llm_factory import LLMFactory
+from src.core.llm_cache import is_cache_hit
+from src.utils import hash_key
 
 logger = logging.getLogger(__name__)
 
+# Context view each agent reads (see analysis.views); "full" is repo_data.
+# Agents on the same view share one cached prompt prefix.
+NODE_VIEWS = {
+    "intelligence": "overview",
+    "architect": "full",
+    "visualizer": "structure",
+    "writer": "full",
+    "reviewer": "claims",
+}
+
+def _repo_context(state: DocumentationState, node: str) -> str:
+    """The node's context view, falling back to the full map when views are off."""
+    view = NODE_VIEWS.get(node, "full")
+    if view != "full":
+        text = (state.get("repo_views") or {}).get(view)
+        if text:
+            return text
+    return state['repo_data']
+
+def _get_model(model_name: str, node: str):
+    """The node's model; nodes listed in LLM_CACHE_SKIP_NODES bypass the response cache."""
+    skipped = {n.strip() for n in config.LLM_CACHE_SKIP_NODES.split(",") if n.strip()}
+    return LLMFactory.get_model(model_name, cache_responses=node not in skipped)
+
+def _context_messages(role_prompt: str, repo_text: str, task: str) -> List[BaseMessage]:
+    """
+    Builds an agent's messages with the repository context as the leading,
+    byte-identical block of the system prompt, followed by the agent's role
+    and then its task. Every call after the first can then reuse the
+    provider's cached prefix instead of re-reading the whole map.
+
+    Anthropic only caches up to an explicit `cache_control` breakpoint;
+    OpenAI-compatible providers cache long shared prefixes automatically.
+    """
+    context = f"{REPOSITORY_CONTEXT_PREAMBLE}{repo_text}{REPOSITORY_CONTEXT_END}"
+    if config.ACTIVE_PROVIDER == "anthropic" and not config.is_local:
+        system = [
+            {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": role_prompt},
+        ]
+    else:
+        system = f"{context}\n\n{role_prompt}"
+    return [SystemMessage(content=system), HumanMessage(content=task)]
+
+def _invoke(node: str, llm, messages: List[BaseMessage], repo_text: str) -> Tuple[str, Dict[str, Dict[str, int]]]:
+    """
+    Calls the model and returns its text plus this node's token counts
+    (merged into `token_usage` by the state reducer).
+    """
+    kwargs = {}
+    if config.ACTIVE_PROVIDER == "openai" and not config.is_local:
+        # Routes every call sharing this context to the same cache shard
+        kwargs["prompt_cache_key"] = f"repo-{hash_key(repo_text)[:32]}"
+    response = llm.invoke(messages, **kwargs)
+    content = response.content
+    
+    # Handle both string and list content types (e.g. Anthropic blocks)
+    if isinstance(content, list):
+        content = "\n".join(str(c) for c in content)
+    
+    if is_cache_hit(response):
+        # Replayed from the response cache: nothing was sent
+        logger.debug(f"{node}: response cache hit")
+        return str(content), {node: {"calls": 1, "llm_cache_hits": 1}}
+    
+    usage = getattr(response, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    counts = {
+        "calls": 1,
+        "input": usage.get("input_tokens", 0) or 0,
+        "cache_read": details.get("cache_read", 0) or 0,
+        "cache_creation": details.get("cache_creation", 0) or 0,
+        "output": usage.get("output_tokens", 0) or 0,
+    }
+    logger.debug(f"{node}: {counts['input']} input tokens, {counts['cache_read']} from cache")
+    return str(content), {node: counts}
+
 def node_intelligence(state: DocumentationState) -> Dict[str, Any]:
     """
     Analyzes the codebase for engineering insights and professional quality markers.
     """
     logger.info("--- Node: Intelligence ---")
-    llm = LLMFactory.get_model(config.MODEL_PLANNER)
-    repo_text = state['repo_data']
+    llm = _get_model(config.MODEL_PLANNER, "intelligence")
+    repo_text = _repo_context(state, "intelligence")
     
-    messages = [
-        SystemMessage(content=ENGINEERING_INSIGHTS_PROMPT),
-        HumanMessage(content=f"Analyze this codebase for engineering quality:\n\n{repo_text}")
-    ]
+    messages = _context_messages(
+        ENGINEERING_INSIGHTS_PROMPT,
+        repo_text,
+        "Analyze this codebase for engineering quality."
+    )
     
-    response = llm.invoke(messages)
+    content, usage = _invoke("intelligence", llm, messages, repo_text)
     
-    content = response.content
-    if isinstance(content, list):
-        # Handle cases where content is a list of blocks (e.g. Anthropic)
-        content = "\n".join([str(c) for c in content])
-        
     # Store the insights to be used by the Writer
     return {
-        "best_practices": [str(content)]
+        "best_practices": [content],
+        "token_usage": usage
     }
 
 def node_architect(state: DocumentationState) -> Dict[str, Any]:
@@ -47,8 +124,8 @@ def node_architect(state: DocumentationState) -> Dict[str, Any]:
     The Architect analyzes the repo data and produces a professional plan.
     """
     logger.info("--- Node: Architect ---")
-    planner_llm = LLMFactory.get_model(config.MODEL_PLANNER)
-    repo_text = state['repo_data']
+    planner_llm = _get_model(config.MODEL_PLANNER, "architect")
+    repo_text = _repo_context(state, "architect")
     
     # Flatten insights for prompt injection
     raw_insights = state.get("best_practices", [])
@@ -58,40 +135,29 @@ def node_architect(state: DocumentationState) -> Dict[str, Any]:
             insights_str += "\n".join([str(i) for i in item])
         else:
             insights_str += str(item)
-            
+    
     user_instructions = state.get("user_instructions", "")
     
     # Load persistent user memory
     memory_context = memory.load()
     
-    prompt_content = f"""Analyze this repository and design a Stripe-quality documentation plan. 
+    prompt_content = f"""Analyze this repository and design a Stripe-quality documentation plan.
 
 Insights found: {insights_str}
 
 *** USER MEMORY (HISTORICAL PREFERENCES) ***
-{memory_context}
-
-Context:
-{repo_text}"""
+{memory_context}"""
 
     if user_instructions:
         prompt_content += f"\n\n*** USER INSTRUCTIONS (PRIORITY): {user_instructions} ***"
 
-    messages = [
-        SystemMessage(content=ARCHITECT_PROMPT),
-        HumanMessage(content=prompt_content)
-    ]
-    
-    response = planner_llm.invoke(messages)
-    content = response.content
-    
-    # Handle both string and list content types
-    if isinstance(content, list):
-        content = "\n".join(str(c) for c in content)
-    
+    messages = _context_messages(ARCHITECT_PROMPT, repo_text, prompt_content)
+
+    content, usage = _invoke("architect", planner_llm, messages, repo_text)
+
     return {
         "project_summary": content,
-        "repo_data": repo_text
+        "token_usage": usage
     }
 
 def node_writer(state: DocumentationState) -> Dict[str, Any]:
@@ -99,8 +165,8 @@ def node_writer(state: DocumentationState) -> Dict[str, Any]:
     The Writer drafts the high-fidelity content.
     """
     logger.info("--- Node: Writer ---")
-    writer_llm = LLMFactory.get_model(config.MODEL_WRITER)
-    repo_text = state['repo_data']
+    writer_llm = _get_model(config.MODEL_WRITER, "writer")
+    repo_text = _repo_context(state, "writer")
     plan = state.get("project_summary", "")
     
     # Robustly flatten insights list
@@ -127,28 +193,18 @@ Engineering Insights:
 *** USER MEMORY (HISTORICAL PREFERENCES) ***
 {memory_context}
 
-Codebase Context:
-{repo_text}
-
 Task: Write the full README.md. Include the Engineering Insights section."""
 
     if user_instructions:
         msg += f"\n\n*** USER INSTRUCTIONS (PRIORITY): {user_instructions} ***"
-        
-    messages = [
-        SystemMessage(content=WRITER_PROMPT),
-        HumanMessage(content=msg)
-    ]
-    
-    response = writer_llm.invoke(messages)
-    content = response.content
-    
-    # Handle both string and list content types
-    if isinstance(content, list):
-        content = "\n".join(str(c) for c in content)
-    
+
+    messages = _context_messages(WRITER_PROMPT, repo_text, msg)
+
+    content, usage = _invoke("writer", writer_llm, messages, repo_text)
+
     return {
-        "draft_sections": {"full_readme": content}
+        "draft_sections": {"full_readme": content},
+        "token_usage": usage
     }
 
 def node_visualizer(state: DocumentationState) -> Dict[str, Any]:
@@ -156,28 +212,25 @@ def node_visualizer(state: DocumentationState) -> Dict[str, Any]:
     Generates high-quality badges and styled Mermaid diagrams.
     """
     logger.info("--- Node: Visualizer ---")
-    planner_llm = LLMFactory.get_model(config.MODEL_PLANNER)
-    repo_text = state['repo_data']
+    planner_llm = _get_model(config.MODEL_PLANNER, "visualizer")
+    repo_text = _repo_context(state, "visualizer")
     local_path = state.get('local_path', '')
     
     # Deterministic Badge Generation
     badges = generate_badges(local_path) if local_path else []
     badges_md = "\n".join(badges)
     
-    messages = [
-        SystemMessage(content=VISUALIZER_PROMPT),
-        HumanMessage(content=f"Repository Context:\n{repo_text}\n\nPRE-CALCULATED BADGES (USE THESE):\n{badges_md}\n\nTask: Generate the Badge Row (using the provided ones) and a styled Mermaid diagram.")
-    ]
-    
-    response = planner_llm.invoke(messages)
-    content = response.content
+    messages = _context_messages(
+        VISUALIZER_PROMPT,
+        repo_text,
+        f"PRE-CALCULATED BADGES (USE THESE):\n{badges_md}\n\nTask: Generate the Badge Row (using the provided ones) and a styled Mermaid diagram."
+    )
     
-    # Handle both string and list content types
-    if isinstance(content, list):
-        content = "\n".join(str(c) for c in content)
+    content, usage = _invoke("visualizer", planner_llm, messages, repo_text)
     
     return {
-        "visual_assets": [content]
+        "visual_assets": [content],
+        "token_usage": usage
     }
 
 def node_reviewer(state: DocumentationState) -> Dict[str, Any]:
@@ -185,34 +238,27 @@ def node_reviewer(state: DocumentationState) -> Dict[str, Any]:
     The Reviewer ensures the README meets 'Principal Engineer' standards.
     """
     logger.info("--- Node: Reviewer ---")
-    planner_llm = LLMFactory.get_model(config.MODEL_PLANNER)
+    planner_llm = _get_model(config.MODEL_PLANNER, "reviewer")
     draft = state['draft_sections'].get('full_readme', '')
-    repo_text = state['repo_data']
-    
-    messages = [
-        SystemMessage(content=REVIEWER_PROMPT),
-        HumanMessage(content=f"Codebase Context:\n{repo_text}\n\nReview this README draft:\n\n{draft}")
-    ]
+    repo_text = _repo_context(state, "reviewer")
     
-    response = planner_llm.invoke(messages)
-    feedback_text = response.content
+    messages = _context_messages(REVIEWER_PROMPT, repo_text, f"Review this README draft:\n\n{draft}")
     
-    # Handle both string and list content types
-    if isinstance(feedback_text, list):
-        feedback_text = "\n".join(str(item) for item in feedback_text)
+    feedback_text, usage = _invoke("reviewer", planner_llm, messages, repo_text)
     
     # Simple Text Parsing for Robustness with Small Models
     if "REJECT" in feedback_text.upper():
         status = "REJECT"
     else:
         status = "APPROVE"
-        
+    
     # Extract feedback cleaner if possible
     feedback = feedback_text.replace("Status:", "").replace("Feedback:", "").strip()
-
+    
     iteration = state.get("iteration", 0) + 1
     
     return {
         "review_feedback": feedback,
-        "iteration": iteration
+        "iteration": iteration,
+        "token_usage": usage
     }
@@ -1,125 +1,811 @@
 import os
-import subprocess
+import time
 import logging
 from pathlib import Path
-from typing import List, Dict, Set
-from concurrent.futures import ThreadPoolExecutor
-from src.analysis.parser import CodeParser
+from collections import deque
+from typing import List, Dict, Optional, Tuple, Iterator, Deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from src.analysis.parser import CodeParser, FileSkeleton, FileAnalysis
+from src.analysis.packer import FileCandidate, Representation, REPRESENTATION_WEIGHTS, pack
+from src.analysis.repo_map import RepositoryMap, Segment
+from src.analysis.snapshot import SnapshotStore, FileSnapshot, read_snapshot
+from src.analysis.collector import FileCollector, FileRecord
 from src.analysis.graph import DependencyGraph
-from src.core.constants import IGNORE_DIRS, IGNORE_EXTENSIONS
-from src.utils import count_tokens, truncate_tokens, safe_read_file
+from src.analysis.graph_cache import GraphCache
+from src.analysis.symbols import SymbolIndex, top_symbols
+from src.analysis.focus import Focus, personalization, focused_budget
+from src.analysis.packages import (
+    Package, WORKSPACE_FILES, find_package_roots, workspace_members, member_roots, split_packages, rank_shards,
+    shard_summary
+)
+from src.analysis.views import ContextView, CONTEXT_VIEWS, DEPENDENCIES_HEADER, dependency_lines
+from src.analysis.screening import screen_name, screen_content, format_size, SAMPLE_BYTES, SCREEN_VERSION
+from src.core.config import config
+from src.utils import count_tokens, truncate_tokens_with_count, DiskCache, hash_key, PhaseTimer
 
 logger = logging.getLogger(__name__)
 
+# In "auto" mode, smaller repos use threads (process start-up would dominate)
+PROCESS_POOL_MIN_FILES = 2000
+PROCESS_CHUNK_SIZE = 32
+THREAD_WORKERS = 10
+# Parses (threads) or chunks (processes) kept in flight per worker
+WINDOW_PER_WORKER = 2
+# Stop parsing once the cheapest representations of parsed files add up to this many budgets
+CANDIDATE_OVERSUPPLY = 2.0
+# Small files also compete with their full text
+FULL_TEXT_MAX_BYTES = 2048
+# Value multiplier for essential config files
+ESSENTIAL_BOOST = 5.0
+ESSENTIAL_FILES = {'readme.md', 'package.json', 'requirements.txt', 'pyproject.toml', 'dockerfile', 'cargo.toml', 'go.mod'}
+PATHS_HEADER = "--- OTHER FILES (paths only) ---\n"
+# Scaled rank of files skipped by screening (uniform rank is 1.0): listed last, if at all
+SKIPPED_FILE_RANK = 0.01
+# Partial skeletons offered per file: its k most referenced definitions
+SYMBOL_TOP_K = (1, 3, 8)
+# Share of a view's budget held for its dependency list (when it has one)
+DEPENDENCY_SHARE = 0.25
+
+# Per-process parser for process-pool skeleton extraction, and whether it collects references
+_worker_parser: Optional[CodeParser] = None
+_worker_references = True
+
+
+def _init_worker(references: bool = True):
+    """Gives each pool process its own parser (token encoder is per-process via import)."""
+    global _worker_parser, _worker_references
+    _worker_parser = CodeParser()
+    _worker_references = references
+
+
+def _format_skeleton(rel_path: str, rank: float, skeleton: str) -> str:
+    if skeleton and skeleton.strip():
+        return f"--- SKELETON: {rel_path} (Priority: {rank:.4f}) ---\n{skeleton}\n\n"
+    return ""
+
+
+def _format_full(rel_path: str, rank: float, content: str) -> str:
+    return f"--- FILE: {rel_path} (Priority: {rank:.4f}) ---\n{content}\n--- END FILE ---\n\n"
+
+
+def _option(kind: str, text: str, share: float = 1.0) -> Representation:
+    return Representation(kind, text, count_tokens(text), share)
+
+
+def _symbol_options(rel_path: str, rank: float, skeleton: FileSkeleton, scores: List[float]) -> List[Representation]:
+    """Top-k symbol views of a file, each worth its share of the full skeleton."""
+    options = []
+    n = len(skeleton.definitions)
+    for k in SYMBOL_TOP_K:
+        if k >= n:
+            break
+        chosen, share = top_symbols(scores, k)
+        partial = FileSkeleton(definitions=[skeleton.definitions[i] for i in chosen])
+        header = f"--- SYMBOLS: {rel_path} (Priority: {rank:.4f}, {k} of {n} definitions) ---"
+        options.append(_option("symbols", f"{header}\n{partial.render()}\n\n", share))
+    return options
+
+
+def _build_candidate(
+    f_path: str,
+    rel_path: str,
+    rank: float,
+    scale: float,
+    skeleton: FileSkeleton,
+    snapshot: Optional[FileSnapshot] = None,
+    symbol_scores: Optional[List[float]] = None
+) -> FileCandidate:
+    """Every representation of a parsed file, each with its token count."""
+    options = [_option("path", f"- {rel_path}\n")]
+    names = skeleton.render_names()
+    if names:
+        options.append(_option("names", f"--- OUTLINE: {rel_path} (Priority: {rank:.4f}) ---\n{names}\n\n"))
+    if symbol_scores is not None and len(symbol_scores) == len(skeleton.definitions):
+        options.extend(_symbol_options(rel_path, rank, skeleton, symbol_scores))
+    segment = _format_skeleton(rel_path, rank, skeleton.render())
+    if segment:
+        options.append(_option("skeleton", segment))
+    try:
+        size = snapshot.size if snapshot else os.path.getsize(f_path)
+        if size <= FULL_TEXT_MAX_BYTES:
+            snapshot = snapshot or read_snapshot(f_path)
+            content = snapshot.text if snapshot else ""
+            if content.strip():
+                options.append(_option("full", _format_full(rel_path, rank, content)))
+    except OSError:
+        pass
+    # Scale so a uniform rank is 1.0 regardless of repo size
+    return FileCandidate(f_path, rank * scale, options)
+
+
+def _worker_analyze(f_path: str, snapshot: Optional[FileSnapshot], timings: PhaseTimer) -> FileAnalysis:
+    with timings.phase("parse"):
+        try:
+            return _worker_parser.analyze(f_path, snapshot, references=_worker_references)
+        except Exception as e:
+            logger.debug(f"Skipping {f_path}: {e}")
+            return FileAnalysis()
+
+
+def _analyze_chunk(paths: List[str]) -> Tuple[List[str], Dict[str, float], Dict[str, Dict[str, float]]]:
+    """
+    Analyzes a chunk of files in a worker process. Returns analysis json per path,
+    the chunk's timings and its per-language parse stats.
+    """
+    timings = PhaseTimer()
+    results = [_worker_analyze(f_path, None, timings).to_json() for f_path in paths]
+    return results, timings.as_dict(), _worker_parser.stats(reset=True)
+
+
+def _parse_chunk(
+    jobs: List[Tuple[str, str, float, float, Optional[List[float]]]]
+) -> Tuple[List[Tuple[str, FileCandidate]], Dict[str, float], Dict[str, Dict[str, float]]]:
+    """
+    Parses a chunk of (path, rel_path, rank, scale, symbol_scores) jobs in a worker process.
+    Returns (analysis json, candidate) per job, in order, the chunk's phase timings
+    and its per-language parse stats.
+    """
+    results = []
+    timings = PhaseTimer()
+    for f_path, rel_path, rank, scale, symbol_scores in jobs:
+        # Workers can't share the parent's store: read once here for both uses
+        snapshot = read_snapshot(f_path)
+        analysis = _worker_analyze(f_path, snapshot, timings)
+        with timings.phase("tokenize"):
+            candidate = _build_candidate(f_path, rel_path, rank, scale, analysis.skeleton, snapshot, symbol_scores)
+        results.append((analysis.to_json(), candidate))
+    return results, timings.as_dict(), _worker_parser.stats(reset=True)
+
+
 class ContextBuilder:
     """
     Optimized Context Builder with multi-threading and accurate token counting.
     """
     
-    def __init__(self, root_dir: str):
+    def __init__(
+        self,
+        root_dir: str,
+        cache: Optional[DiskCache] = None,
+        use_cache: bool = True,
+        executor: Optional[str] = None,
+        workers: Optional[int] = None
+    ):
         self.root_dir = root_dir
+        # Skeleton extraction mode: "thread", "process", or "auto" (by repo size)
+        self.executor = executor or config.ANALYSIS_EXECUTOR
+        self.workers = workers or config.ANALYSIS_WORKERS or os.cpu_count() or 4
         self.parser = CodeParser()
-        self.graph = DependencyGraph(root_dir)
+        # Each file is read once per run and shared by the graph, parser and packer
+        self.snapshots = SnapshotStore()
+        # Seconds per phase of the last build (worker phases are summed across workers)
+        self.timings = PhaseTimer()
+        # Files parsed and parse seconds per language in the last build (all workers)
+        self.parse_stats: Dict[str, Dict[str, float]] = {}
+        # Cross-file reference scores of definitions for the current build
+        self.symbols: Optional[SymbolIndex] = None
+        if use_cache and cache is None:
+            cache = DiskCache(
+                os.path.join(config.ANALYSIS_CACHE_DIR, "skeletons"),
+                max_bytes=config.SKELETON_CACHE_MAX_MB * 1024 * 1024
+            )
+        self.cache = cache if use_cache else None
+        # Imports come from the parser, so cached graphs are tied to both versions
+        graph_cache = GraphCache(
+            os.path.join(config.ANALYSIS_CACHE_DIR, "graph.sqlite"),
+            root_dir,
+            version=f"{DependencyGraph.VERSION}.{CodeParser.VERSION}"
+        ) if use_cache else None
+        self.graph = DependencyGraph(
+            root_dir, snapshots=self.snapshots, timings=self.timings, extract=self._analyze_imports,
+            cache=graph_cache
+        )
+        self.collector = FileCollector(root_dir)
+        # File metadata by path (blob id, size, ...), filled by _collect_files
+        self.records: Dict[str, FileRecord] = {}
+        # Outlines (imports, definition names, references) of the files analyzed this
+        # run, for the graph, focus and symbol index; skeleton text is not kept
+        self.analyses: Dict[str, FileAnalysis] = {}
+        # Skeletons of parsed files the disk cache can't hand back (no cache or no
+        # blob id), held only until their candidate is built
+        self._skeletons: Dict[str, FileSkeleton] = {}
 
-    def _collect_files(self) -> List[str]:
+    def _collect_files(self) -> List[FileRecord]:
         """
-        Collects files using 'git ls-files' if available (respects .gitignore),
+        Collects file records from the git index if available (respects .gitignore),
         otherwise falls back to os.walk with manual ignore lists.
         """
-        # 1. Try Git Method
-        if os.path.exists(os.path.join(self.root_dir, ".git")):
-            try:
-                # Get list of tracked files, respecting .gitignore
-                result = subprocess.run(
-                    ["git", "ls-files"], 
-                    cwd=self.root_dir, 
-                    capture_output=True, 
-                    text=True, 
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-                if result.returncode == 0:
-                    git_files = result.stdout.splitlines()
-                    # Filter by extension and existence
-                    final_files = []
-                    for f in git_files:
-                        full_path = os.path.join(self.root_dir, f)
-                        if os.path.isfile(full_path):
-                            if not any(f.endswith(ext) for ext in IGNORE_EXTENSIONS):
-                                final_files.append(full_path)
-                    if final_files:
-                        logger.info(f"Using git ls-files: Found {len(final_files)} files.")
-                        return final_files
-            except Exception as e:
-                logger.warning(f"Git ls-files failed, falling back to os.walk: {e}")
-
-        # 2. Fallback OS Walk Method
-        files = []
-        for root, dirs, filenames in os.walk(self.root_dir):
-            dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
-            for name in filenames:
-                if any(name.endswith(ext) for ext in IGNORE_EXTENSIONS):
-                    continue
-                files.append(os.path.join(root, name))
-        return files
-
-    def _process_file(self, f_path: str, rank: float, mode: str = "skeleton") -> str:
-        """Process a single file based on mode."""
+        records = self.collector.collect()
+        self.records = {r.path: r for r in records}
+        return records
+
+    def _screen_file(self, record: FileRecord) -> Optional[str]:
+        """Reason to skip analyzing a file (large, generated, minified, data), or None."""
+        reason = screen_name(record.rel_path, record.size, record.is_generated)
+        if reason or os.path.basename(record.rel_path).lower() in ESSENTIAL_FILES:
+            return reason
+
+        # Content verdicts are cached by blob so unchanged files aren't sampled again
+        key = hash_key(record.blob_id, "screen", SCREEN_VERSION) if self.cache and record.blob_id else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached or None
+
+        # Sampled from the run's snapshot (mapped above MMAP_THRESHOLD, so only the
+        # head is paged in), which the graph and parser then reuse
+        snapshot = self.snapshots.get(record.path)
+        reason = screen_content(record.rel_path, bytes(snapshot.data[:SAMPLE_BYTES])) if snapshot else None
+        if key:
+            self.cache.set(key, reason or "")
+        return reason
+
+    def _screen(self, records: List[FileRecord]) -> Tuple[List[FileRecord], List[Tuple[FileRecord, str]]]:
+        """
+        Splits records into files to analyze and files only worth listing, so one
+        huge or minified file can't dominate the graph, parse and token budget.
+        """
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            reasons = list(executor.map(self._screen_file, records))
+        kept, skipped = [], []
+        for record, reason in zip(records, reasons):
+            if reason:
+                skipped.append((record, reason))
+                self.snapshots.release(record.path)
+            else:
+                kept.append(record)
+        if skipped:
+            logger.info(f"Listing {len(skipped)} large/generated files by path only.")
+        return kept, skipped
+
+    def _blob_id(self, f_path: str) -> Optional[str]:
+        """
+        Content id of a file. Clean tracked files use the git blob id from the
+        index so they are never read; others are hashed from their snapshot.
+        """
+        record = self.records.get(f_path)
+        if record and record.blob_id:
+            return record.blob_id
+        snapshot = self.snapshots.get(f_path)
+        return snapshot.blob_id if snapshot is not None else None
+
+    def _analysis_key(self, f_path: str) -> Optional[str]:
+        """Cache key for a file's analysis: content hash + extension + parser version (+ references)."""
+        blob_id = self._blob_id(f_path)
+        if not blob_id:
+            return None
+        ext = os.path.splitext(f_path)[1]
+        return hash_key(blob_id, ext, CodeParser.VERSION, "refs" if config.SYMBOL_RANKING else "")
+
+    def _load_analysis(self, key: Optional[str]) -> Optional[FileAnalysis]:
+        """Full analysis (with skeleton text) from the disk cache, or None."""
+        data = self.cache.get(key) if key else None
+        if data is None:
+            return None
+        try:
+            return FileAnalysis.from_json(data)
+        except Exception:
+            return None
+
+    def _cached_analysis(self, f_path: str, key: Optional[str]) -> Optional[FileAnalysis]:
+        """The file's outline from this run or the disk cache, or None."""
+        outline = self.analyses.get(f_path)
+        if outline is not None:
+            return outline
+        analysis = self._load_analysis(key)
+        if analysis is None:
+            return None
+        outline = self.analyses[f_path] = analysis.outline()
+        return outline
+
+    def _store_analysis(
+        self,
+        f_path: str,
+        key: Optional[str],
+        analysis: FileAnalysis,
+        data: Optional[str] = None,
+        pending: bool = False
+    ):
+        """
+        Keeps the outline in memory and the full analysis in the disk cache. A
+        `pending` file (candidate not built yet) without a cache entry keeps its
+        skeleton in memory instead, so it is never parsed twice.
+        """
+        self.analyses[f_path] = analysis.outline()
+        if key:
+            self.cache.set(key, data if data is not None else analysis.to_json())
+        elif pending:
+            self._skeletons[f_path] = analysis.skeleton
+
+    def _stored_skeleton(self, f_path: str, key: Optional[str]) -> Optional[FileSkeleton]:
+        """Skeleton parsed earlier this run (held in memory or in the disk cache), or None."""
+        skeleton = self._skeletons.pop(f_path, None)
+        if skeleton is not None:
+            return skeleton
+        analysis = self._load_analysis(key)
+        return analysis.skeleton if analysis is not None else None
+
+    def _merge_parse_stats(self, stats: Dict[str, Dict[str, float]]):
+        for lang, values in stats.items():
+            totals = self.parse_stats.setdefault(lang, {"files": 0, "seconds": 0.0})
+            totals["files"] += values["files"]
+            totals["seconds"] += values["seconds"]
+
+    def _parse(self, f_path: str, key: Optional[str], pending: bool = False) -> FileAnalysis:
+        snapshot = self.snapshots.get(f_path)
+        with self.timings.phase("parse"):
+            analysis = self.parser.analyze(f_path, snapshot, references=config.SYMBOL_RANKING)
+        self._store_analysis(f_path, key, analysis, pending=pending)
+        return analysis
+
+    def _get_analysis(self, f_path: str) -> FileAnalysis:
+        """Returns the file's outline from this run or the cache, parsing it on a miss."""
+        key = self._analysis_key(f_path) if self.cache else None
+        outline = self._cached_analysis(f_path, key)
+        if outline is not None:
+            return outline
+        return self._parse(f_path, key, pending=True).outline()
+
+    def _get_skeleton(self, f_path: str) -> FileSkeleton:
+        """
+        The file's full skeleton, only while its candidate is built: kept from the
+        imports pass, or parsed now if that pass never saw it (graph cache hit) or
+        its cache entry was evicted since.
+        """
+        key = self._analysis_key(f_path) if self.cache else None
+        skeleton = self._stored_skeleton(f_path, key)
+        return skeleton if skeleton is not None else self._parse(f_path, key).skeleton
+
+    def _analyze_imports(self, files: List[str]) -> Dict[str, List[str]]:
+        """
+        Imports of `files` for the dependency graph. Each file is parsed once here
+        (in parallel, cached by content); its skeleton is read back from the cache,
+        or held in memory without one, when its candidate is built.
+        """
+        if self._use_processes(len(files)):
+            self._analyze_process(files)
+        else:
+            with ThreadPoolExecutor(max_workers=THREAD_WORKERS) as executor:
+                list(executor.map(self._get_analysis, files))
+        return {f: self.analyses[f].imports for f in files if f in self.analyses}
+
+    def _analyze_process(self, files: List[str]):
+        """Process-pool analysis: cache hits are served here, misses parsed in chunks."""
+        misses = []
+        for f in files:
+            key = self._analysis_key(f) if self.cache else None
+            if self._cached_analysis(f, key) is None:
+                misses.append((f, key))
+        if not misses:
+            return
+        chunks = [misses[j:j + PROCESS_CHUNK_SIZE] for j in range(0, len(misses), PROCESS_CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(config.SYMBOL_RANKING,)) as pool:
+            for chunk, (results, timings, stats) in zip(chunks, pool.map(_analyze_chunk, [[f for f, _ in c] for c in chunks])):
+                self.timings.merge(timings)
+                self._merge_parse_stats(stats)
+                for (f, key), data in zip(chunk, results):
+                    self._store_analysis(f, key, FileAnalysis.from_json(data), data, pending=True)
+
+    def _candidate(self, f_path: str, rank: float, scale: float) -> FileCandidate:
         rel_path = os.path.relpath(f_path, self.root_dir)
         try:
-            if mode == "full":
-                content = safe_read_file(f_path)
-                if content:
-                    content = truncate_tokens(content, 15000)
-                    return f"--- FILE: {rel_path} (Priority: {rank:.4f}) ---\n{content}\n--- END FILE ---\n\n"
-            else:
-                skeleton = self.parser.parse_file(f_path)
-                if skeleton and skeleton.strip():
-                    return f"--- SKELETON: {rel_path} (Priority: {rank:.4f}) ---\n{skeleton}\n\n"
+            skeleton = self._get_skeleton(f_path)
         except Exception as e:
             logger.debug(f"Skipping {f_path}: {e}")
-        return ""
+            skeleton = FileSkeleton()
+        snapshot = self._small_snapshot(f_path)
+        with self.timings.phase("tokenize"):
+            return _build_candidate(f_path, rel_path, rank, scale, skeleton, snapshot, self._symbol_scores(f_path))
 
-    def build_repository_map(self, max_tokens: int = 128000) -> str:
-        all_files = self._collect_files()
-        logger.info(f"Target Token Budget: {max_tokens} | Total Files: {len(all_files)}")
-        
-        ranks = self.graph.build_and_rank(all_files)
+    def _symbol_scores(self, f_path: str) -> Optional[List[float]]:
+        return self.symbols.file_scores(f_path) if self.symbols else None
+
+    def _analyze_parseable(self, files: List[str]) -> Dict[str, FileAnalysis]:
+        """Analyses of every file with a grammar (mostly cache hits once the graph is built)."""
+        parseable = [f for f in files if os.path.splitext(f)[1] in CodeParser.SUPPORTED_LANGUAGES]
+        self._analyze_imports(parseable)
+        return {f: self.analyses[f] for f in parseable if f in self.analyses}
+
+    def _build_symbol_index(self, files: List[str], ranks: Dict[str, float], focus: Optional[Focus] = None):
+        """Scores every definition by its references; definitions matching the focus go first."""
+        analyses = self._analyze_parseable(files)
+        with self.timings.phase("symbols"):
+            self.symbols = SymbolIndex(analyses, ranks)
+            if focus:
+                for f, analysis in analyses.items():
+                    self.symbols.promote(f, focus.matching_definitions(analysis))
+
+    def _focus_ranks(self, focus: Focus, files: List[str], max_tokens: int) -> Tuple[Optional[Dict[str, float]], int]:
+        """
+        PageRank personalized to the files the focus matches (paths and definition
+        names), and the token budget that focus needs. Only path globs that select
+        files shrink the budget: keywords come from free-form instructions and just
+        reorder files. (None, max_tokens) if nothing matches.
+        """
+        analyses = self._analyze_parseable(files) if focus.keywords else {}
+        rel_paths = {f: self.records[f].rel_path.replace(os.sep, "/") for f in files}
+        seeds = focus.seeds(rel_paths, analyses)
+        if not seeds:
+            logger.info("Focus matched no files, using global ranks.")
+            return None, max_tokens
+        ranks = self.graph.rank_personalized(personalization(seeds, files))
+        if not (focus.globs and focus.matches_any(rel_paths.values())):
+            logger.info(f"Focus matched {len(seeds)} files by keyword, keeping the {max_tokens:,} token budget.")
+            return ranks, max_tokens
+        budget = focused_budget(ranks, max_tokens)
+        logger.info(f"Focus matched {len(seeds)} files: token budget {max_tokens:,} -> {budget:,}")
+        return ranks, budget
+
+    def _small_snapshot(self, f_path: str) -> Optional[FileSnapshot]:
+        """Snapshot for files small enough to offer full text (None skips the read)."""
+        record = self.records.get(f_path)
+        if record is None or record.size > FULL_TEXT_MAX_BYTES:
+            return None
+        return self.snapshots.get(f_path)
+
+    def _config_candidate(self, f_path: str, rank: float, scale: float, max_tokens: int) -> FileCandidate:
+        """Essential config files compete with their (truncated) full text."""
+        rel_path = os.path.relpath(f_path, self.root_dir)
+        options = [_option("path", f"- {rel_path}\n")]
+        content = self.snapshots.text(f_path)
+        if content:
+            with self.timings.phase("tokenize"):
+                # Count the content while truncating it instead of encoding it twice
+                content, tokens = truncate_tokens_with_count(content, max_tokens)
+                frame_tokens = count_tokens(_format_full(rel_path, rank, ""))
+            options.append(Representation("full", _format_full(rel_path, rank, content), tokens + frame_tokens))
+        return FileCandidate(f_path, rank * scale, options, boost=ESSENTIAL_BOOST)
+
+    def _use_processes(self, n_files: int) -> bool:
+        if self.executor == "process":
+            return True
+        if self.executor == "thread":
+            return False
+        return n_files >= PROCESS_POOL_MIN_FILES and (os.cpu_count() or 1) > 2
+
+    def _iter_candidates(self, files: List[str], ranks: Dict[str, float], scale: float) -> Iterator[FileCandidate]:
+        """
+        Lazily yields a candidate (all representations with token counts) per file, in order.
+
+        At most a bounded window of parses is in flight, so memory scales with the
+        window rather than the repo. When the consumer stops iterating (enough
+        candidates), pending work is cancelled and nothing further is scheduled.
+        """
+        if self._use_processes(len(files)):
+            yield from self._iter_candidates_process(files, ranks, scale)
+            return
+
+        window = THREAD_WORKERS * WINDOW_PER_WORKER
+        with ThreadPoolExecutor(max_workers=THREAD_WORKERS) as executor:
+            pending: Deque[Future] = deque()
+            try:
+                for f in files:
+                    pending.append(executor.submit(self._candidate, f, ranks.get(f, 0), scale))
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _iter_candidates_process(self, files: List[str], ranks: Dict[str, float], scale: float) -> Iterator[FileCandidate]:
+        """
+        Process-pool variant: files go out in rank-ordered chunks; cache hits are
+        served here and misses are parsed by worker processes that sidestep the GIL.
+        """
+        window = self.workers * WINDOW_PER_WORKER
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(config.SYMBOL_RANKING,)) as pool:
+            # Each unit: (entries, future) where entries are cache hits or miss keys
+            pending: Deque[Tuple[list, Optional[Future]]] = deque()
+            try:
+                for j in range(0, len(files), PROCESS_CHUNK_SIZE):
+                    pending.append(self._submit_chunk(pool, files[j:j + PROCESS_CHUNK_SIZE], ranks, scale))
+                    if len(pending) >= window:
+                        yield from self._collect_chunk(*pending.popleft())
+                while pending:
+                    yield from self._collect_chunk(*pending.popleft())
+            finally:
+                for _, future in pending:
+                    if future:
+                        future.cancel()
+
+    def _submit_chunk(self, pool: ProcessPoolExecutor, chunk: List[str], ranks: Dict[str, float], scale: float) -> Tuple[list, Optional[Future]]:
+        entries, jobs = [], []
+        for f in chunk:
+            rel_path, rank = os.path.relpath(f, self.root_dir), ranks.get(f, 0)
+            key = self._analysis_key(f) if self.cache else None
+            skeleton = self._stored_skeleton(f, key)
+            if skeleton is not None:
+                snapshot = self._small_snapshot(f)
+                with self.timings.phase("tokenize"):
+                    entries.append(("hit", _build_candidate(
+                        f, rel_path, rank, scale, skeleton, snapshot, self._symbol_scores(f)
+                    )))
+            else:
+                entries.append(("miss", (f, key)))
+                jobs.append((f, rel_path, rank, scale, self._symbol_scores(f)))
+        future = pool.submit(_parse_chunk, jobs) if jobs else None
+        return entries, future
+
+    def _collect_chunk(self, entries: list, future: Optional[Future]) -> Iterator[FileCandidate]:
+        parsed = iter(())
+        if future:
+            results, timings, stats = future.result()
+            self.timings.merge(timings)
+            self._merge_parse_stats(stats)
+            parsed = iter(results)
+        for kind, value in entries:
+            if kind == "hit":
+                yield value
+                continue
+            data, candidate = next(parsed)
+            f, key = value
+            self._store_analysis(f, key, FileAnalysis.from_json(data), data)
+            yield candidate
+
+    def _shard_packages(self, files: List[str]) -> Optional[Tuple[Dict[str, float], List[Package]]]:
+        """
+        Monorepos (at least MONOREPO_MIN_PACKAGES nested packages: declared workspace
+        members, or roots owning MONOREPO_MIN_PACKAGE_FILES files) are ranked per
+        package and merged through the package graph. None for ordinary repos.
+        """
+        rel_paths = {f: self.records[f].rel_path.replace(os.sep, "/") for f in files}
+        # Skipped manifests (e.g. a huge package.json) still mark a package
+        records = [(r.path, r.rel_path.replace(os.sep, "/")) for r in self.records.values()]
+        roots = find_package_roots(rel for _, rel in records)
+        if len([r for r in roots if r]) < config.MONOREPO_MIN_PACKAGES:
+            return None
+        manifests = {
+            rel: self.snapshots.text(path) for path, rel in records
+            if os.path.basename(rel) in WORKSPACE_FILES
+        }
+        members = workspace_members(manifests, roots)
+        roots = member_roots(roots, members, rel_paths, config.MONOREPO_MIN_PACKAGE_FILES)
+        if len([r for r in roots if r]) < config.MONOREPO_MIN_PACKAGES:
+            return None
+        with self.timings.phase("pagerank"):
+            packages = split_packages(rel_paths, roots)
+            ranks = rank_shards(packages, self.graph.edges)
+        logger.info(f"Monorepo: ranked {len(packages)} packages as separate shards.")
+        return ranks, packages
+
+    def _pack(
+        self,
+        candidates: List[FileCandidate],
+        budget: int,
+        packages: List[Package],
+        weights: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Representation]:
+        if packages:
+            groups = {f: p.root for p in packages for f in p.files}
+            group_budgets = {p.root: int(max(budget, 0) * p.share) for p in packages}
+            return pack(candidates, max(budget, 0), groups, group_budgets, weights)
+        return pack(candidates, max(budget, 0), weights=weights)
+
+    def _assemble(
+        self,
+        header: str,
+        total_files: int,
+        candidates: List[FileCandidate],
+        chosen: Dict[str, Representation],
+        ranks: Dict[str, float],
+        extra: Tuple[Segment, ...] = ()
+    ) -> RepositoryMap:
+        """Header, any extra sections, chosen files in candidate order, then paths-only files."""
+        repo_map = RepositoryMap(os.path.basename(self.root_dir), total_files)
+        repo_map.add(Segment("header", header, count_tokens(header)))
+        for segment in extra:
+            repo_map.add(segment)
+        path_segments = []
+        for candidate in candidates:
+            option = chosen.get(candidate.path)
+            if option is None:
+                continue
+            segment = Segment(
+                option.kind, option.text, option.tokens,
+                path=os.path.relpath(candidate.path, self.root_dir),
+                rank=ranks.get(candidate.path, 0)
+            )
+            if option.kind == "path":
+                path_segments.append(segment)
+            else:
+                repo_map.add(segment)
+        if path_segments:
+            repo_map.add(Segment("paths_header", PATHS_HEADER, count_tokens(PATHS_HEADER)))
+            for segment in path_segments:
+                repo_map.add(segment)
+        return repo_map
+
+    def _assemble_within(
+        self,
+        limit: int,
+        header: str,
+        total_files: int,
+        candidates: List[FileCandidate],
+        chosen: Dict[str, Representation],
+        ranks: Dict[str, float],
+        extra: Tuple[Segment, ...] = (),
+        weights: Optional[Dict[str, float]] = None
+    ) -> RepositoryMap:
+        """
+        Assembles the map and enforces `limit` on its rendered text: segment
+        counts can miss tokens that merge across boundaries, so while the map is
+        over, the lowest-value files are dropped until at least the excess is freed.
+        """
+        by_path = {c.path: c for c in candidates}
+        value = lambda f: by_path[f].value(chosen[f], weights or REPRESENTATION_WEIGHTS)
+        while True:
+            repo_map = self._assemble(header, total_files, candidates, chosen, ranks, extra)
+            excess = repo_map.total_tokens - limit
+            if excess <= 0 or not chosen:
+                return repo_map
+            chosen = dict(chosen)
+            for f in sorted(chosen, key=value):
+                excess -= chosen.pop(f).tokens
+                if excess <= 0:
+                    break
+
+    def _dependency_segment(self, chosen: Dict[str, Representation], ranks: Dict[str, float], budget: int) -> Optional[Segment]:
+        """Import edges between the files a view shows, highest ranked first, within `budget`."""
+        files = sorted(chosen, key=lambda f: -ranks.get(f, 0))
+        rel_paths = {f: os.path.relpath(f, self.root_dir).replace(os.sep, "/") for f in files}
+        text, tokens = DEPENDENCIES_HEADER, count_tokens(DEPENDENCIES_HEADER)
+        for line in dependency_lines(files, self.graph.edges, rel_paths):
+            line_tokens = count_tokens(line)
+            if tokens + line_tokens > budget:
+                break
+            text += line
+            tokens += line_tokens
+        if text == DEPENDENCIES_HEADER:
+            return None
+        return Segment("dependencies", text + "\n", tokens + 1)
+
+    def _build_view(
+        self,
+        view: ContextView,
+        header: str,
+        total_files: int,
+        candidates: List[FileCandidate],
+        ranks: Dict[str, float],
+        max_tokens: int,
+        packages: List[Package]
+    ) -> RepositoryMap:
+        """Re-packs the full map's candidates for a view (no files are read or parsed again)."""
+        view_max = int(max_tokens * view.budget_share)
+        view_header = header.rstrip("\n") + f"\nView: {view.name} ({view.budget_share:.0%} of the full budget)\n\n"
+        budget = view_max - count_tokens(view_header) - count_tokens(PATHS_HEADER) - view_max // 100
+        dependency_budget = int(max(budget, 0) * DEPENDENCY_SHARE) if view.dependencies else 0
+        chosen = self._pack(candidates, budget - dependency_budget, packages, view.weights)
+        extra = ()
+        if view.dependencies:
+            segment = self._dependency_segment(chosen, ranks, dependency_budget)
+            extra = (segment,) if segment else ()
+        return self._assemble_within(
+            view_max, view_header, total_files, candidates, chosen, ranks, extra, view.weights
+        )
+
+    def build_repository_map(self, max_tokens: int = 128000, focus: str = "") -> RepositoryMap:
+        """
+        Builds the token-budgeted repository map.
+
+        With a `focus` (path globs and/or keywords, e.g. "src/api/** endpoints"),
+        files are ranked by PageRank personalized to the matching files and
+        definitions, and a narrow path-glob focus shrinks the budget.
+
+        With CONTEXT_VIEWS, the map also carries the smaller named views of
+        analysis.views, packed from the same candidates with their own budgets.
+        """
+        self.timings.reset()
+        self.parse_stats = {}
+        self.parser.stats(reset=True)
+        start = time.perf_counter()
+        with self.timings.phase("collect"):
+            records = self._collect_files()
+        logger.info(f"Target Token Budget: {max_tokens} | Total Files: {len(records)}")
+        with self.timings.phase("screen"):
+            kept, skipped = self._screen(records)
+        all_files = [r.path for r in kept]
+
+        blobs = None
+        if self.graph.cache:
+            # Hashes only files git can't vouch for (untracked or modified)
+            with self.timings.phase("imports"):
+                blobs = {f: self._blob_id(f) for f in all_files}
+        ranks = self.graph.build_and_rank(all_files, blobs=blobs)
+        focus_spec = Focus.parse(focus, (r.rel_path.replace(os.sep, "/") for r in records)) if focus else None
+        if focus_spec:
+            focused, max_tokens = self._focus_ranks(focus_spec, all_files, max_tokens)
+            ranks = focused or ranks
+            focus_spec = focus_spec if focused else None
+        # A focus already says where the budget goes; otherwise monorepos split it by package
+        packages: List[Package] = []
+        if not focus_spec and config.MONOREPO_SHARDING:
+            sharded = self._shard_packages(all_files)
+            if sharded:
+                ranks, packages = sharded
+        if config.SYMBOL_RANKING:
+            self._build_symbol_index(all_files, ranks, focus_spec)
         sorted_files = sorted(all_files, key=lambda x: ranks.get(x, 0), reverse=True)
         
-        current_tokens = 0
-        output_parts = []
+        header = f"# Repository Map: {os.path.basename(self.root_dir)}\nTotal Files: {len(records)}\n"
+        if focus_spec:
+            header += f"Focus: {', '.join(focus_spec.globs + sorted(focus_spec.keywords))}\n"
+        if packages:
+            header += f"Packages ({len(packages)}):\n{shard_summary(packages)}\n"
+        header += "\n"
+        # 1% slack: segment counts don't add up exactly once joined, and trimming the
+        # rendered map (see _assemble_within) is rarely needed with it
+        budget = max_tokens - count_tokens(header) - count_tokens(PATHS_HEADER) - max_tokens // 100
+        scale = float(len(all_files) or 1)
         
-        header = f"# Repository Map: {os.path.basename(self.root_dir)}\nTotal Files: {len(all_files)}\n\n"
-        output_parts.append(header)
-        current_tokens += count_tokens(header)
-        
-        essential_files = {'readme.md', 'package.json', 'requirements.txt', 'pyproject.toml', 'dockerfile', 'cargo.toml', 'go.mod'}
-        processed_files = set()
-        
-        # Pass 1: Configuration (Full)
+        # Configuration files (full text, capped so one file can't take the whole budget)
+        configs = [f for f in sorted_files if os.path.basename(f).lower() in ESSENTIAL_FILES]
+        config_limit = max(min(15000, budget // 4), 0)
         with ThreadPoolExecutor(max_workers=8) as executor:
-            configs = [f for f in sorted_files if os.path.basename(f).lower() in essential_files]
-            results = list(executor.map(lambda f: self._process_file(f, ranks.get(f, 0), "full"), configs))
-            for res in results:
-                if not res: continue
-                tokens = count_tokens(res)
-                if current_tokens + tokens < max_tokens:
-                    output_parts.append(res)
-                    current_tokens += tokens
-                    processed_files.update(configs)
-
-        # Pass 2: High Priority Skeletons (Concurrent)
-        top_files = [f for f in sorted_files if f not in processed_files]
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            skeletons = list(executor.map(lambda f: self._process_file(f, ranks.get(f, 0), "skeleton"), top_files))
-            for res in skeletons:
-                if not res: continue
-                tokens = count_tokens(res)
-                if current_tokens + tokens < max_tokens:
-                    output_parts.append(res)
-                    current_tokens += tokens
-                else:
+            candidates = list(executor.map(lambda f: self._config_candidate(f, ranks.get(f, 0), scale, config_limit), configs))
+
+        # Source files (streamed in rank order until there is enough to choose from)
+        config_set = set(configs)
+        others = [f for f in sorted_files if f not in config_set]
+        stream = self._iter_candidates(others, ranks, scale)
+        parsed, supply = 0, 0
+        try:
+            for candidate in stream:
+                candidates.append(candidate)
+                parsed += 1
+                supply += min((o.tokens for o in candidate.options if o.kind != "path"), default=0)
+                if supply >= budget * CANDIDATE_OVERSUPPLY:
                     break
+        finally:
+            # Cancels in-flight parses once we have enough candidates
+            stream.close()
+
+        # Unparsed files can still be listed by path
+        path_supply = 0
+        for f in others[parsed:]:
+            if path_supply >= budget:
+                break
+            rel_path = os.path.relpath(f, self.root_dir)
+            path_option = _option("path", f"- {rel_path}\n")
+            candidates.append(FileCandidate(f, ranks.get(f, 0) * scale, [path_option]))
+            path_supply += path_option.tokens
+
+        # Skipped files are listed with the reason they were not analyzed
+        for record, reason in skipped:
+            if path_supply >= budget:
+                break
+            path_option = _option("path", f"- {record.rel_path} ({reason}, {format_size(record.size)})\n")
+            candidates.append(FileCandidate(record.path, SKIPPED_FILE_RANK, [path_option]))
+            path_supply += path_option.tokens
+
+        with self.timings.phase("pack"):
+            chosen = self._pack(candidates, budget, packages)
+        repo_map = self._assemble_within(max_tokens, header, len(records), candidates, chosen, ranks)
+
+        if config.CONTEXT_VIEWS:
+            with self.timings.phase("views"):
+                for name, view in CONTEXT_VIEWS.items():
+                    repo_map.views[name] = self._build_view(
+                        view, header, len(records), candidates, ranks, max_tokens, packages
+                    )
+            logger.info("Context views: " + ", ".join(
+                f"{name} {view.total_tokens:,} tokens" for name, view in repo_map.views.items()
+            ))
+
+        logger.info(f"Read {self.snapshots.reads} files")
+        self.snapshots.clear()
+        self.analyses.clear()
+        self._skeletons.clear()
+        self.symbols = None
+        if self.cache:
+            logger.info(f"Analysis cache: {self.cache.hits} hits, {self.cache.misses} misses")
+            self.cache.prune()
 
-        return "".join(output_parts)
+        self._merge_parse_stats(self.parser.stats(reset=True))
+        if self.parse_stats:
+            logger.info("Parse time: " + ", ".join(
+                f"{lang} {s['seconds']:.2f}s/{s['files']} files"
+                for lang, s in sorted(self.parse_stats.items(), key=lambda item: -item[1]["seconds"])
+            ))
+        self.timings.add("total", time.perf_counter() - start)
+        logger.info(f"Repository map: {len(repo_map.files)} files, {repo_map.total_tokens:,} tokens")
+        return repo_map
@@ -0,0 +1,190 @@
+import os
+import subprocess
+import logging
+from dataclasses import dataclass
+from typing import List, Dict, Set, Optional, Tuple
+
+from src.core.constants import IGNORE_DIRS, IGNORE_EXTENSIONS, IGNORE_FILES
+
+logger = logging.getLogger(__name__)
+
+# Lower-cased once so filtering is a set lookup per path
+_IGNORE_EXTENSIONS = {ext.lower() for ext in IGNORE_EXTENSIONS}
+_IGNORE_FILES = {name.lower() for name in IGNORE_FILES}
+
+# Git index modes we never analyze
+_SYMLINK_MODE = "120000"
+_GITLINK_MODE = "160000"  # Submodule
+
+
+@dataclass(frozen=True)
+class FileRecord:
+    """A file selected for analysis, with the metadata later stages need."""
+    path: str                      # Root-joined path, used as the file's id everywhere
+    rel_path: str                  # Root-relative path with forward slashes
+    size: int
+    blob_id: Optional[str] = None  # Git blob id; None if the working copy differs from it
+    is_binary: bool = False
+    is_lfs: bool = False
+    is_generated: bool = False     # linguist-generated / linguist-vendored in .gitattributes
+
+
+def is_ignored(rel_path: str) -> bool:
+    """Suffix/name based filtering (IGNORE_EXTENSIONS and IGNORE_FILES)."""
+    name = rel_path.rsplit("/", 1)[-1].lower()
+    if name in _IGNORE_FILES:
+        return True
+    return os.path.splitext(name)[1] in _IGNORE_EXTENSIONS
+
+
+class FileCollector:
+    """
+    Collects the files of a repository as FileRecords.
+
+    For git repositories everything comes from a few bulk git calls: the
+    index (mode, blob id, binary flag via `--eol`), blob sizes from
+    `ls-tree -l`, and LFS attributes from `check-attr`. Only files whose
+    working copy differs from the index are stat'ed individually.
+    Non-git directories fall back to os.walk with the manual ignore lists.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        # Tracked files whose working copy differs from the index
+        self.modified: Set[str] = set()
+
+    def git(self, *args: str, input: Optional[str] = None) -> Optional[str]:
+        """Runs a git command in the repo, returning stdout or None on failure."""
+        try:
+            result = subprocess.run(
+                ["git", *args],
+                cwd=self.root_dir,
+                input=input,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='ignore'
+            )
+        except Exception as e:
+            logger.debug(f"git {args[0]} failed: {e}")
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+    def collect(self) -> List[FileRecord]:
+        if os.path.exists(os.path.join(self.root_dir, ".git")):
+            try:
+                records = self._collect_git()
+                if records:
+                    logger.info(f"Using git ls-files: Found {len(records)} files.")
+                    return records
+            except Exception as e:
+                logger.warning(f"Git ls-files failed, falling back to os.walk: {e}")
+        return self._collect_walk()
+
+    def _split(self, output: Optional[str]) -> List[str]:
+        return [entry for entry in (output or "").split("\0") if entry]
+
+    def _blob_sizes(self) -> Dict[str, int]:
+        """Blob id -> size for everything in HEAD, in one call."""
+        sizes = {}
+        for entry in self._split(self.git("ls-tree", "-r", "-l", "-z", "HEAD")):
+            # Format: "<mode> <type> <blob> <size>\t<path>"
+            meta = entry.partition("\t")[0].split()
+            if len(meta) == 4 and meta[1] == "blob" and meta[3].isdigit():
+                sizes[meta[2]] = int(meta[3])
+        return sizes
+
+    def _attributes(self, paths: List[str], has_attributes: bool) -> Tuple[Set[str], Set[str]]:
+        """
+        Paths stored in Git LFS (their checkout may be a pointer file) and paths
+        marked linguist-generated/vendored, from one batched check-attr call.
+        """
+        if not has_attributes or not paths:
+            return set(), set()
+        output = self.git(
+            "check-attr", "-z", "--stdin", "filter", "linguist-generated", "linguist-vendored",
+            input="\0".join(paths) + "\0"
+        )
+        fields = self._split(output)
+        lfs, generated = set(), set()
+        # Output triples: path, attribute, value
+        for i in range(0, len(fields) - 2, 3):
+            path, attribute, value = fields[i:i + 3]
+            if attribute == "filter" and value == "lfs":
+                lfs.add(path)
+            elif attribute != "filter" and value in ("set", "true"):
+                generated.add(path)
+        return lfs, generated
+
+    def _collect_git(self) -> List[FileRecord]:
+        output = self.git("ls-files", "-s", "--eol", "-z")
+        if output is None:
+            return []
+
+        deleted = set(self._split(self.git("ls-files", "-d", "-z")))
+        self.modified = set(self._split(self.git("ls-files", "-m", "-z"))) - deleted
+        sizes = self._blob_sizes()
+
+        entries = []
+        has_attributes = False
+        for entry in self._split(output):
+            # Format: "<mode> <blob> <stage>\t<eolinfo>\t<path>"
+            meta, _, rest = entry.partition("\t")
+            eol_info, _, rel_path = rest.partition("\t")
+            mode, blob_id, _ = meta.split(" ")
+            if rel_path.endswith(".gitattributes"):
+                has_attributes = True
+            if mode in (_SYMLINK_MODE, _GITLINK_MODE) or rel_path in deleted or is_ignored(rel_path):
+                continue
+            is_binary = eol_info.startswith("i/-text")
+            entries.append((rel_path, blob_id, is_binary))
+
+        lfs, generated = self._attributes([rel_path for rel_path, _, _ in entries], has_attributes)
+
+        records = []
+        skipped = 0
+        seen = set()
+        for rel_path, blob_id, is_binary in entries:
+            if rel_path in seen:
+                continue  # Unmerged paths appear once per stage
+            seen.add(rel_path)
+            full_path = os.path.join(self.root_dir, rel_path)
+            size = sizes.get(blob_id)
+            if rel_path in self.modified or size is None:
+                try:
+                    size = os.path.getsize(full_path)
+                except OSError:
+                    continue
+            record = FileRecord(
+                path=full_path,
+                rel_path=rel_path,
+                size=size,
+                blob_id=None if rel_path in self.modified else blob_id,
+                is_binary=is_binary,
+                is_lfs=rel_path in lfs,
+                is_generated=rel_path in generated,
+            )
+            if record.is_binary or record.is_lfs:
+                skipped += 1
+                continue
+            records.append(record)
+
+        if skipped:
+            logger.info(f"Skipped {skipped} binary/LFS files.")
+        return records
+
+    def _collect_walk(self) -> List[FileRecord]:
+        records = []
+        for root, dirs, filenames in os.walk(self.root_dir):
+            dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
+            for name in filenames:
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, self.root_dir).replace(os.sep, "/")
+                if is_ignored(rel_path):
+                    continue
+                try:
+                    size = os.path.getsize(full_path)
+                except OSError:
+                    continue
+                records.append(FileRecord(path=full_path, rel_path=rel_path, size=size))
+        return records
@@ -0,0 +1,182 @@
+import re
+import fnmatch
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Set, Iterable, Optional
+
+from src.analysis.parser import FileAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Seed weight per kind of match
+GLOB_WEIGHT = 3.0
+PATH_KEYWORD_WEIGHT = 1.0
+DEFINITION_KEYWORD_WEIGHT = 0.5
+MAX_DEFINITION_WEIGHT = 2.0
+
+# Random-jump mass kept uniform so files outside the focus still have an order
+UNIFORM_SHARE = 0.1
+# A focus is as wide as the share of files holding this much of the focused rank...
+RANK_MASS = 0.8
+# ...and gets BUDGET_FACTOR x that share of the token budget, never less than MIN_BUDGET_SHARE
+# (path-glob focuses only; keywords from prose just reorder files)
+BUDGET_FACTOR = 2.0
+MIN_BUDGET_SHARE = 0.25
+
+# Instruction words that say nothing about *where* to look
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'into', 'onto', 'about', 'all', 'any', 'its', 'this', 'that',
+    'focus', 'focused', 'heavily', 'mainly', 'mostly', 'only', 'especially', 'please', 'more', 'less',
+    'document', 'documentation', 'describe', 'explain', 'cover', 'highlight', 'emphasize', 'include',
+    'readme', 'section', 'sections', 'part', 'parts', 'area', 'areas', 'layer', 'layers',
+    'code', 'codebase', 'project', 'repo', 'repository', 'file', 'files', 'folder', 'folders',
+    'directory', 'module', 'modules', 'how', 'what', 'use', 'used', 'using', 'make', 'sure', 'should',
+    'add', 'first', 'last', 'then', 'also', 'them', 'their', 'there', 'than', 'each', 'every', 'other',
+    'docs', 'doc', 'example', 'examples', 'instruction', 'instructions', 'guide', 'tutorial', 'usage',
+    'write', 'show', 'list', 'detail', 'details', 'detailed', 'overview', 'summary', 'short', 'long',
+    'clear', 'good', 'better', 'best', 'main', 'important', 'key', 'new', 'want', 'need', 'like',
+    'but', 'are', 'was', 'been', 'can', 'will', 'would', 'could', 'must', 'just',
+}
+# The keyword after one of these is excluded instead of focused on ("ignore the legacy folder")
+NEGATIONS = {'ignore', 'exclude', 'skip', 'except', 'without', 'not', 'no'}
+
+_WORDS = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+_TOKEN = re.compile(r'[\w./*?\-\[\]]+')
+
+
+def _normalize(word: str) -> str:
+    word = word.lower()
+    # Cheap singular form so "endpoints" matches "endpoint" and "queries" "query"
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+_STOPWORDS = {_normalize(w) for w in STOPWORDS}
+
+
+def split_words(name: str) -> Set[str]:
+    """Lowercase words of an identifier or path ("getUserAPI_v2" -> get, user, api, v, 2)."""
+    return {_normalize(w) for w in _WORDS.findall(name)}
+
+
+def _is_glob(token: str, paths: Optional[List[str]]) -> bool:
+    """Whether a focus token names paths (see Focus.parse); without `paths`, any token with a separator does."""
+    if any(c in token for c in "*?["):
+        return any(c in token.strip("*?[]") for c in "/.")
+    if "/" not in token:
+        return False
+    return paths is None or Focus([token]).matches_any(paths)
+
+
+@dataclass
+class Focus:
+    """Where a focused run should look: path globs and keywords from the focus text."""
+    globs: List[str] = field(default_factory=list)
+    keywords: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def parse(cls, text: str, paths: Optional[Iterable[str]] = None) -> "Focus":
+        """
+        Tokens that look like paths are globs: a wildcard next to a path segment
+        or extension ("src/api/**", "*.proto"), or a path prefix of one of
+        `paths` ("src/api"). Prose such as "and/or" or "client/server" is split
+        into keywords instead, like every other word, minus instruction words
+        and anything the text asks to ignore.
+        """
+        focus = cls()
+        paths = list(paths) if paths is not None else None
+        negated = False
+        for token in _TOKEN.findall(text or ""):
+            if _is_glob(token.strip("."), paths):
+                if not negated:
+                    focus.globs.append(token.strip("."))
+                negated = False
+                continue
+            for word in token.split("."):
+                if word.lower() in NEGATIONS:
+                    negated = True
+                    continue
+                words = [w for w in split_words(word) if len(w) >= 3 and w not in _STOPWORDS]
+                if not words:
+                    continue
+                if not negated:
+                    focus.keywords.update(words)
+                negated = False
+        return focus
+
+    def __bool__(self) -> bool:
+        return bool(self.globs or self.keywords)
+
+    def matches_path(self, rel_path: str) -> bool:
+        parts = rel_path.split("/")
+        for glob in self.globs:
+            if "/" not in glob.rstrip("/"):
+                # "*.proto" or "api/": any file name or directory on the path
+                if any(fnmatch.fnmatch(part, glob.rstrip("/")) for part in parts):
+                    return True
+                continue
+            # "api/**" or "src/api": matched from any directory down, not just the root
+            prefix = glob.lstrip("/").rstrip("/*")
+            for i in range(len(parts)):
+                tail = "/".join(parts[i:])
+                if fnmatch.fnmatch(tail, glob.lstrip("/")) or tail.startswith(prefix + "/"):
+                    return True
+        return False
+
+    def matches_any(self, rel_paths: Iterable[str]) -> bool:
+        return any(self.matches_path(p) for p in rel_paths)
+
+    def matching_definitions(self, analysis: FileAnalysis) -> List[int]:
+        """Indices of definitions whose name contains a focus keyword."""
+        if not self.keywords:
+            return []
+        return [
+            i for i, d in enumerate(analysis.skeleton.definitions)
+            if self.keywords & split_words(d.name)
+        ]
+
+    def seeds(self, files: Dict[str, str], analyses: Dict[str, FileAnalysis]) -> Dict[str, float]:
+        """
+        Personalization weights (file id -> weight) for the files the focus
+        points at. `files` maps file ids to root-relative paths.
+        """
+        seeds = {}
+        for f, rel_path in files.items():
+            weight = GLOB_WEIGHT if self.globs and self.matches_path(rel_path) else 0.0
+            if self.keywords:
+                weight += PATH_KEYWORD_WEIGHT * len(self.keywords & split_words(rel_path))
+                analysis = analyses.get(f)
+                if analysis is not None:
+                    matched = len(self.matching_definitions(analysis))
+                    weight += min(DEFINITION_KEYWORD_WEIGHT * matched, MAX_DEFINITION_WEIGHT)
+            if weight > 0:
+                seeds[f] = weight
+        logger.debug(f"Focus {self.globs + sorted(self.keywords)} seeds {len(seeds)}/{len(files)} files.")
+        return seeds
+
+
+def personalization(seeds: Dict[str, float], files: List[str]) -> Dict[str, float]:
+    """Random-jump distribution: the seeds, plus a small uniform share over all files."""
+    total = sum(seeds.values())
+    uniform = UNIFORM_SHARE / max(len(files), 1)
+    weights = {f: uniform for f in files}
+    for f, weight in seeds.items():
+        weights[f] = weights.get(f, 0.0) + (1.0 - UNIFORM_SHARE) * weight / total
+    return weights
+
+
+def focused_budget(ranks: Dict[str, float], max_tokens: int) -> int:
+    """Token budget for a focused map: smaller when the rank sits on few files."""
+    scores = sorted(ranks.values(), reverse=True)
+    total = sum(scores)
+    if not scores or total <= 0:
+        return max_tokens
+    mass, count = 0.0, 0
+    for score in scores:
+        mass += score
+        count += 1
+        if mass >= RANK_MASS * total:
+            break
+    share = min(1.0, max(MIN_BUDGET_SHARE, BUDGET_FACTOR * count / len(scores)))
+    return int(max_tokens * share)
@@ -1,9 +1,15 @@
 import os
 import re
+import hashlib
 import logging
-import networkx as nx
-from typing import List, Dict
-from src.utils import safe_read_file
+from typing import List, Dict, Set, Optional, Callable
+from src.utils import safe_read_file, PhaseTimer
+from src.analysis.snapshot import SnapshotStore, read_snapshot
+from src.analysis.imports import get_scanner
+from src.analysis.pagerank import CSRGraph, pagerank
+from src.analysis.resolver import ModuleIndex
+from src.analysis.graph_cache import GraphCache, FileEntry
+from src.core.config import config
 
 logger = logging.getLogger(__name__)
 
@@ -12,115 +18,246 @@ class DependencyGraph:
     Builds a dependency graph of the repository and calculates PageRank.
     """
     
-    # Expanded Patterns for Polyglot Support
-    PATTERNS = {
-        # Python
-        '.py': [
-            r'^\s*from\s+([\w\.]+)\s+import',
-            r'^\s*import\s+([\w\.]+)'
-        ],
-        # JavaScript / TypeScript
-        '.js': [
-            r'import\s+.*\s+from\s+[\'"](.+)[\'"]',
-            r'require\s*\([\'"](.+)[\'"]\)'
-        ],
-        '.ts': [
-            r'import\s+.*\s+from\s+[\'"](.+)[\'"]',
-            r'require\s*\([\'"](.+)[\'"]\)'
-        ],
-        '.tsx': [r'import\s+.*\s+from\s+[\'"](.+)[\'"]'],
-        '.jsx': [r'import\s+.*\s+from\s+[\'"](.+)[\'"]'],
-        
-        # Go (Simple implementation, handles single imports and some multi-line)
-        '.go': [
-            r'import\s+"(.+)"',
-            r'\s+"(.+)"'  # Captures imports inside import ( ... ) blocks loosely
-        ],
-        
-        # Java
-        '.java': [
-            r'^\s*import\s+([\w\.]+);'
-        ],
-        
-        # Rust
-        '.rs': [
-            r'^\s*use\s+([\w\:]+);',
-            r'^\s*mod\s+([\w]+);'
-        ]
-    }
-
-    def __init__(self, root_dir: str):
+    # Bump whenever import scanning or resolution change (invalidates cached graphs)
+    VERSION = "6"
+
+    def __init__(
+        self,
+        root_dir: str,
+        snapshots: Optional[SnapshotStore] = None,
+        timings: Optional[PhaseTimer] = None,
+        extract: Optional[Callable[[List[str]], Dict[str, List[str]]]] = None,
+        cache: Optional[GraphCache] = None
+    ):
         self.root_dir = root_dir
+        # Batch import extraction (e.g. the builder's parse-once analysis); defaults to the regex scanners
+        self.extract = extract
+        # Shared per-run file reads (falls back to reading directly)
+        self.snapshots = snapshots
+        # Seconds spent in import extraction, graph building and PageRank
+        self.timings = timings or PhaseTimer()
+        # Imports, edges and ranks persisted between runs (None: always rebuild)
+        self.cache = cache
+        # Per-file state kept between runs for incremental rebuilds
+        self.imports: Dict[str, List[str]] = {}
+        self.edges: Dict[str, List[str]] = {}
+        self.ranks: Dict[str, float] = {}
+        # Import resolution over the current file list (rebuilt per build)
+        self.index: Optional[ModuleIndex] = None
+        # CSR graph of the last build, kept for re-ranking with a personalization
+        self.csr: Optional[CSRGraph] = None
 
-    def _resolve_path(self, current_file: str, import_str: str) -> str:
-        """
-        Resolves import string to absolute file path.
-        Handles relative imports.
-        """
-        # Naive resolution
-        current_dir = os.path.dirname(current_file)
-        
-        # 1. Relative import
-        if import_str.startswith('.'):
-            # Resolve relative
-            target = os.path.normpath(os.path.join(current_dir, import_str))
-            
-            # Try extensions
-            for ext in ['.py', '.js', '.ts', '.tsx', '.jsx', '.go', '.rs', '.java']:
-                if os.path.exists(target + ext):
-                    return target + ext
-                if os.path.exists(os.path.join(target, 'index' + ext)):
-                     return os.path.join(target, 'index' + ext)
-            
-            if os.path.exists(target):
-                 return target
-                 
-        # 2. Absolute/Library import - We skip external libs for now, 
-        # but if it matches a path in root, we might track it.
-        # For this version, we focus on internal relative imports for the graph structure.
-        return None
+    def _read(self, file_path: str) -> str:
+        return self.snapshots.text(file_path) if self.snapshots else safe_read_file(file_path)
 
     def _extract_imports(self, file_path: str) -> List[str]:
-        ext = os.path.splitext(file_path)[1]
-        patterns = self.PATTERNS.get(ext, [])
-        if not patterns:
+        scanner = get_scanner(os.path.splitext(file_path)[1])
+        if scanner is None:
+            return []
+        snapshot = self.snapshots.get(file_path) if self.snapshots else read_snapshot(file_path)
+        if snapshot is None:
             return []
-            
-        imports = []
         try:
-            content = safe_read_file(file_path)
-            if content:
-                for p in patterns:
-                    matches = re.finditer(p, content, re.MULTILINE)
-                    for m in matches:
-                        imports.append(m.group(1))
-        except Exception:
-            pass
-        return imports
-
-    def build_and_rank(self, files: List[str]) -> Dict[str, float]:
+            return scanner.scan(snapshot)
+        except Exception as e:
+            logger.debug(f"Import scan failed for {file_path}: {e}")
+            return []
+
+    @staticmethod
+    def _import_stems(import_str: str) -> Set[str]:
+        """
+        Every path/module segment of an import string (e.g. 'pkg.mod.symbol' ->
+        pkg, mod, symbol): from-imports and `use` paths name a symbol after the
+        module, so the module can be any segment.
+        """
+        return {p for p in re.split(r'[/\\.:]+', import_str) if p}
+
+    def _link_file(self, file_path: str):
+        """Resolves a file's raw imports into internal edges (index lookups only)."""
+        targets = []
+        for imp in self.imports.get(file_path, []):
+            for resolved in self.index.resolve(file_path, imp):
+                if resolved != file_path and resolved not in targets:
+                    targets.append(resolved)
+        self.edges[file_path] = targets
+
+    def _stale_links(self, removed: Set[str], added: List[str], skip: Set[str]) -> Set[str]:
+        """
+        Unchanged files whose edges may differ after files were added or removed:
+        those pointing at a removed file, or importing something named like an added one.
+        """
+        if not removed and not added:
+            return set()
+        added_stems = set()
+        for f in added:
+            name = os.path.basename(f)
+            # C includes and ESM paths name the file with its extension
+            added_stems.update((name, os.path.splitext(name)[0]))
+            # Index/__init__/mod files and Go packages are imported by directory name
+            added_stems.add(os.path.basename(os.path.dirname(f)))
+
+        stale = set()
+        for f, imports in self.imports.items():
+            if f in skip:
+                continue
+            if removed and any(t in removed for t in self.edges.get(f, ())):
+                stale.add(f)
+            elif added_stems and any(
+                not added_stems.isdisjoint(self._import_stems(i)) or i.rsplit("/", 1)[-1] in added_stems
+                for i in imports
+            ):
+                stale.add(f)
+        return stale
+
+    def _rel(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.root_dir).replace(os.sep, "/")
+
+    def _load_cached(self, files: List[str], blobs: Dict[str, Optional[str]]) -> Optional[Set[str]]:
+        """
+        Restores imports and edges saved by earlier runs. Cached paths are mapped
+        onto `files` so they compare equal to this run's paths. Returns the files
+        whose content changed since, or None if nothing was cached.
+        """
+        entries = self.cache.load_files()
+        if not entries:
+            return None
+        lookup = {self._rel(f): f for f in files}
+        full = lambda r: lookup.get(r) or os.path.join(self.root_dir, r)
+        self.imports, self.edges = {}, {}
+        cached_blobs = {}
+        for rel, entry in entries.items():
+            f = full(rel)
+            self.imports[f] = entry.imports
+            self.edges[f] = [full(t) for t in entry.targets]
+            cached_blobs[f] = entry.blob
+        return {f for f in files if f in cached_blobs and cached_blobs[f] != blobs.get(f)}
+
+    def _fingerprint(self, graph: CSRGraph) -> str:
+        """Identity of the edge set and ranking settings (same fingerprint, same ranks)."""
+        digest = hashlib.sha1(
+            f"{self.VERSION}\0{config.PAGERANK_TOLERANCE}\0{config.PAGERANK_MAX_ITER}\0".encode("utf-8")
+        )
+        digest.update("\0".join(self._rel(f) for f in graph.nodes).encode("utf-8"))
+        digest.update(graph.indptr.tobytes())
+        digest.update(graph.indices.tobytes())
+        return digest.hexdigest()
+
+    def build_and_rank(self, files: List[str], blobs: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, float]:
         """
         Builds the graph and returns PageRank scores.
+
+        With a cache and the content id (`blobs`) of every file, only files whose
+        blob changed, plus added and deleted files, are re-scanned, and edges are
+        re-resolved only where they can differ. An edge set seen before loads its
+        ranks from the cache; a new one is ranked warm-started from the last scores.
         """
-        G = nx.DiGraph()
-        
-        # Add all files as nodes
-        for f in files:
-            G.add_node(f)
-            
-        # Add edges
-        for f in files:
-            raw_imports = self._extract_imports(f)
-            for imp in raw_imports:
-                resolved = self._resolve_path(f, imp)
-                if resolved and resolved in files: # Only internal links
-                    G.add_edge(f, resolved)
-        
+        use_cache = self.cache is not None and blobs is not None
+        changed = None
+        if use_cache:
+            with self.timings.phase("imports"):
+                changed = self._load_cached(files, blobs)
+
+        file_set = set(files)
+        incremental = changed is not None and bool(self.imports)
+        if not incremental:
+            self.imports, self.edges = {}, {}
+
+        removed = {f for f in self.imports if f not in file_set}
+        for f in removed:
+            self.imports.pop(f, None)
+            self.edges.pop(f, None)
+
+        added = [f for f in files if f not in self.imports]
+        rescan = set(added)
+        if incremental:
+            rescan.update(changed)
+            logger.info(f"Incremental graph update: {len(rescan)} rescanned, {len(removed)} removed.")
+
+        with self.timings.phase("imports"):
+            if self.extract:
+                found = self.extract(sorted(rescan))
+                for f in rescan:
+                    self.imports[f] = found.get(f, [])
+            else:
+                for f in rescan:
+                    self.imports[f] = self._extract_imports(f)
+
+        with self.timings.phase("graph"):
+            # Changed tsconfig/go.mod/... can re-point any import: relink everything
+            relink_all = not incremental or any(
+                ModuleIndex.affects_resolution(self._rel(f)) for f in rescan | removed
+            )
+            relink = set(files) if relink_all else rescan | self._stale_links(removed, added, rescan)
+            if relink:
+                self.index = ModuleIndex(self.root_dir, files, self._read)
+                for f in relink:
+                    self._link_file(f)
+            if use_cache and (relink or removed):
+                self.cache.save_files(
+                    {
+                        self._rel(f): FileEntry(blobs[f], self.imports.get(f, []), [self._rel(t) for t in self.edges.get(f, [])])
+                        for f in relink if blobs.get(f)
+                    },
+                    removed=[self._rel(f) for f in removed]
+                )
+            # Files become integer ids with edges in CSR arrays
+            graph = CSRGraph.from_adjacency(files, self.edges)
+        self.csr = graph
+
+        with self.timings.phase("pagerank"):
+            fingerprint = self._fingerprint(graph) if use_cache else None
+            cached = self.cache.get_ranks(fingerprint) if fingerprint else None
+            if cached is not None and len(cached) == len(graph.nodes):
+                ranks = {f: cached.get(self._rel(f), 0.0) for f in graph.nodes}
+                logger.info("Dependency graph unchanged, ranks loaded from cache.")
+            else:
+                ranks = self._rank(graph, use_cache)
+                if fingerprint:
+                    self.cache.set_ranks(fingerprint, {self._rel(f): r for f, r in ranks.items()})
+        self.ranks = ranks
+        return ranks
+
+    def _rank(self, graph: CSRGraph, use_cache: bool) -> Dict[str, float]:
+        """PageRank of the graph, warm-started from the last scores when there are any."""
+        previous = self.ranks
+        if not previous and use_cache:
+            cached = self.cache.latest_ranks() or {}
+            previous = {os.path.join(self.root_dir, r): score for r, score in cached.items()}
+        nstart = None
+        if previous:
+            default = 1.0 / max(len(graph.nodes), 1)
+            nstart = {f: previous.get(f, default) for f in graph.nodes}
         try:
-            ranks = nx.pagerank(G, alpha=0.85)
-            # Normalize? NetworkX returns sum=1.
-            return ranks
+            # Scores sum to 1 (like nx.pagerank)
+            return pagerank(
+                graph,
+                alpha=0.85,
+                nstart=nstart,
+                tol=config.PAGERANK_TOLERANCE,
+                max_iter=config.PAGERANK_MAX_ITER
+            )
         except Exception as e:
             logger.warning(f"PageRank failed: {e}")
             # Fallback: uniform rank
-            return {f: 1.0 for f in files}
+            return {f: 1.0 for f in graph.nodes}
+
+    def rank_personalized(self, personalization: Dict[str, float]) -> Dict[str, float]:
+        """
+        PageRank of the last built graph with random jumps going to `personalization`
+        (file -> weight) instead of uniformly. Global ranks are left as they are.
+        """
+        if self.csr is None:
+            return dict(self.ranks)
+        try:
+            with self.timings.phase("pagerank"):
+                return pagerank(
+                    self.csr,
+                    alpha=0.85,
+                    personalization=personalization,
+                    nstart=self.ranks or None,
+                    tol=config.PAGERANK_TOLERANCE,
+                    max_iter=config.PAGERANK_MAX_ITER
+                )
+        except Exception as e:
+            logger.warning(f"Personalized PageRank failed: {e}")
+            return dict(self.ranks)
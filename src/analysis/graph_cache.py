@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Iterable
+
+from src.utils import hash_key
+
+logger = logging.getLogger(__name__)
+
+# Rank vectors kept per repository (one per distinct edge set, newest first)
+MAX_RANK_SETS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    repo TEXT NOT NULL,
+    path TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    imports TEXT NOT NULL,
+    targets TEXT NOT NULL,
+    PRIMARY KEY (repo, path)
+);
+CREATE TABLE IF NOT EXISTS ranks (
+    repo TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    ranks TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (repo, fingerprint)
+);
+"""
+
+
+class FileEntry:
+    """Cached graph data of one file: its content id, raw imports and resolved targets."""
+
+    __slots__ = ("blob", "imports", "targets")
+
+    def __init__(self, blob: str, imports: List[str], targets: List[str]):
+        self.blob = blob
+        self.imports = imports
+        self.targets = targets
+
+
+class GraphCache:
+    """
+    SQLite store behind DependencyGraph, shared by every repository mapped from
+    one cache directory.
+
+    Per file (root-relative path) it keeps the blob id it was scanned at, its
+    raw imports and its resolved edges, so only files whose blob changed are
+    re-scanned. Rank vectors are keyed by a fingerprint of the whole edge set,
+    so an unchanged graph skips PageRank entirely. Entries written by another
+    graph `version` are dropped on load.
+    """
+
+    def __init__(self, db_path: str, root_dir: str, version: str):
+        self.db_path = db_path
+        self.repo = hash_key(os.path.abspath(root_dir))
+        self.version = version
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.enabled = True
+        try:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        except Exception as e:
+            logger.warning(f"Graph cache disabled, could not open {db_path}: {e}")
+            self.enabled = False
+
+    def load_files(self) -> Dict[str, FileEntry]:
+        """Every cached file of this repository (empty if the cache is from another version)."""
+        if not self.enabled:
+            return {}
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT version FROM repos WHERE repo = ?", (self.repo,)).fetchone()
+                if row is None or row[0] != self.version:
+                    self._reset()
+                    return {}
+                rows = self._conn.execute(
+                    "SELECT path, blob, imports, targets FROM files WHERE repo = ?", (self.repo,)
+                ).fetchall()
+            return {path: FileEntry(blob, json.loads(imports), json.loads(targets)) for path, blob, imports, targets in rows}
+        except Exception as e:
+            logger.debug(f"Graph cache read failed: {e}")
+            return {}
+
+    def _reset(self):
+        """Drops this repository's rows and marks the cache as written by the current version."""
+        with self._conn:
+            self._conn.execute("DELETE FROM files WHERE repo = ?", (self.repo,))
+            self._conn.execute("DELETE FROM ranks WHERE repo = ?", (self.repo,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO repos (repo, version) VALUES (?, ?)", (self.repo, self.version)
+            )
+
+    def save_files(self, entries: Dict[str, FileEntry], removed: Iterable[str] = ()):
+        """Upserts the given files and deletes removed ones, in one transaction."""
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "DELETE FROM files WHERE repo = ? AND path = ?", [(self.repo, p) for p in removed]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files (repo, path, blob, imports, targets) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (self.repo, path, e.blob, json.dumps(e.imports), json.dumps(e.targets))
+                        for path, e in entries.items()
+                    ]
+                )
+        except Exception as e:
+            logger.debug(f"Graph cache write failed: {e}")
+
+    def get_ranks(self, fingerprint: str) -> Optional[Dict[str, float]]:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT ranks FROM ranks WHERE repo = ? AND fingerprint = ?", (self.repo, fingerprint)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logger.debug(f"Graph cache read failed: {e}")
+            return None
+
+    def latest_ranks(self) -> Optional[Dict[str, float]]:
+        """Most recently stored rank vector (a warm start after the graph changed)."""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT ranks FROM ranks WHERE repo = ? ORDER BY created DESC LIMIT 1", (self.repo,)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            logger.debug(f"Graph cache read failed: {e}")
+            return None
+
+    def set_ranks(self, fingerprint: str, ranks: Dict[str, float]):
+        """Stores a rank vector, keeping only the newest MAX_RANK_SETS per repository."""
+        if not self.enabled:
+            return
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ranks (repo, fingerprint, ranks, created) VALUES (?, ?, ?, ?)",
+                    (self.repo, fingerprint, json.dumps(ranks), time.time())
+                )
+                self._conn.execute(
+                    "DELETE FROM ranks WHERE repo = ? AND fingerprint NOT IN "
+                    "(SELECT fingerprint FROM ranks WHERE repo = ? ORDER BY created DESC LIMIT ?)",
+                    (self.repo, self.repo, MAX_RANK_SETS)
+                )
+        except Exception as e:
+            logger.debug(f"Graph cache write failed: {e}")
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+            self.enabled = False
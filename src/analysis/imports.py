@@ -0,0 +1,191 @@
+import re
+import logging
+from functools import lru_cache
+from typing import List, Optional, Callable, Iterable, Pattern, Tuple
+
+from src.analysis.snapshot import FileSnapshot
+
+logger = logging.getLogger(__name__)
+
+# First chunk decoded when looking for the end of an import header (grown x4 if needed)
+HEADER_SCAN_BYTES = 8 * 1024
+
+
+def _python_imports(m: re.Match) -> Iterable[str]:
+    module, names, plain = m.group(1), m.group(2), m.group(3)
+    if plain is not None:
+        # "import a.b as c, d"
+        for part in plain.split(","):
+            name = part.split(" as ")[0].strip()
+            if name:
+                yield name
+        return
+    # "from pkg import mod" may name a submodule: "pkg.mod" resolves to the
+    # submodule if there is one and falls back to the package otherwise
+    sep = "" if module.endswith(".") else "."
+    found = False
+    for part in names.strip("()\\ \t\n").split(","):
+        name = part.split()[0] if part.split() else ""
+        if name.isidentifier():
+            found = True
+            yield f"{module}{sep}{name}"
+    if not found:
+        yield module
+
+
+def _js_imports(m: re.Match) -> Iterable[str]:
+    yield m.group(1)
+
+
+_GO_QUOTED = re.compile(r'"([^"]+)"')
+
+
+def _go_imports(m: re.Match) -> Iterable[str]:
+    if m.group(1) is not None:
+        # Import block: one quoted path per line
+        yield from _GO_QUOTED.findall(m.group(1))
+    else:
+        yield m.group(2)
+
+
+def _java_imports(m: re.Match) -> Iterable[str]:
+    yield m.group(1)
+
+
+def _rust_imports(m: re.Match) -> Iterable[str]:
+    path, group, module = m.group(1), m.group(2), m.group(3)
+    if module is not None:
+        yield module
+        return
+    path = path.rstrip(":")
+    if group is None:
+        yield path
+        return
+    # "use a::b::{c, d::e}" -> a::b::c, a::b::d::e
+    for item in group.split(","):
+        item = item.split(" as ")[0].strip()
+        if item == "self":
+            yield path
+        elif item and item != "*":
+            yield f"{path}::{item}"
+
+
+def _c_imports(m: re.Match) -> Iterable[str]:
+    yield m.group(1)
+
+
+class ImportScanner:
+    """
+    Single-pass import extraction for one language: one precompiled alternation
+    run once over the text. Languages whose imports must precede all
+    declarations (Go, Java, Kotlin) only decode and scan that header.
+
+    With `anchors`, the pattern is only tried where one of those keywords occurs
+    (found with str.find), or at the start of that line for line-anchored
+    patterns. This beats a top-level regex alternation, which can't use
+    literal-prefix search, when imports can appear anywhere in the file.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        extract: Callable[[re.Match], Iterable[str]],
+        header_end: Optional[str] = None,
+        anchors: Tuple[str, ...] = (),
+        line_anchored: bool = False,
+        flags: int = re.MULTILINE
+    ):
+        self.pattern: Pattern = re.compile(pattern, flags)
+        self.extract = extract
+        self.header_end: Optional[Pattern] = re.compile(header_end, re.MULTILINE) if header_end else None
+        self.anchors = anchors
+        self.line_anchored = line_anchored
+
+    def _anchored_matches(self, text: str) -> List[re.Match]:
+        matches = {}
+        for anchor in self.anchors:
+            i = text.find(anchor)
+            while i != -1:
+                # Whole keywords only ("fromX" / "reimport" don't count)
+                if i == 0 or not (text[i - 1].isalnum() or text[i - 1] in "_$."):
+                    start = text.rfind("\n", 0, i) + 1 if self.line_anchored else i
+                    if start not in matches:
+                        m = self.pattern.match(text, start)
+                        if m:
+                            matches[start] = m
+                i = text.find(anchor, i + len(anchor))
+        return [matches[start] for start in sorted(matches)]
+
+    def _header(self, snapshot: FileSnapshot) -> str:
+        limit = HEADER_SCAN_BYTES
+        while True:
+            text = snapshot.decode(0, limit).replace("\r\n", "\n")
+            match = self.header_end.search(text)
+            if match:
+                return text[:match.start()]
+            if limit >= snapshot.size:
+                return text
+            limit *= 4
+
+    def scan(self, snapshot: FileSnapshot) -> List[str]:
+        text = self._header(snapshot) if self.header_end else snapshot.text
+        matches = self._anchored_matches(text) if self.anchors else self.pattern.finditer(text)
+        imports = []
+        for m in matches:
+            imports.extend(self.extract(m))
+        # Keep first occurrence order, drop repeats
+        return list(dict.fromkeys(imports))
+
+
+# Every module specifier is a string right after one of these keywords:
+# import x from '...', export * from '...', import '...', import('...'), require('...')
+_JS_PATTERN = r'''(?:from|import|require)\s*\(?\s*['"]([^'"\n]+)['"]'''
+
+_JAVA_HEADER_END = (
+    r'^\s*(?:@(?!file:)\w|(?:(?:public|protected|private|abstract|final|sealed|open|internal|data|static)\s+)*'
+    r'(?:class|interface|enum|record|object|fun)\b)'
+)
+
+
+@lru_cache(maxsize=None)
+def get_scanner(ext: str) -> Optional[ImportScanner]:
+    """Compiled import scanner for a file extension (built once per extension), or None."""
+    if ext == ".py":
+        return ImportScanner(
+            r'^[ \t]*(?:from[ \t]+(\.+[\w.]*|[\w.]+)[ \t]+import[ \t]+(\([^)]*\)|[^\n#;]+)'
+            r'|import[ \t]+([\w.]+(?:[ \t]+as[ \t]+\w+)?(?:[ \t]*,[ \t]*[\w.]+(?:[ \t]+as[ \t]+\w+)?)*))',
+            _python_imports,
+            anchors=("import",),
+            line_anchored=True
+        )
+    if ext in ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'):
+        return ImportScanner(_JS_PATTERN, _js_imports, anchors=("from", "import", "require"), flags=0)
+    if ext == ".go":
+        return ImportScanner(
+            r'^import[ \t]*\(([^)]*)\)|^import[ \t]+(?:[\w.]+[ \t]+)?"([^"\n]+)"',
+            _go_imports,
+            header_end=r'^(?:func|type|var|const)\b'
+        )
+    if ext in (".java", ".kt"):
+        return ImportScanner(
+            r'^[ \t]*import[ \t]+(?:static[ \t]+)?(\w+(?:\.\w+)*(?:\.\*)?)',
+            _java_imports,
+            header_end=_JAVA_HEADER_END
+        )
+    if ext == ".rs":
+        return ImportScanner(
+            r'^[ \t]*(?:pub(?:\([^)]*\))?[ \t]+)?(?:use[ \t]+([\w:]+)(?:\{([^}]*)\})?'
+            r'|mod[ \t]+(\w+)[ \t]*;)',
+            _rust_imports,
+            anchors=("use", "mod"),
+            line_anchored=True
+        )
+    if ext in ('.c', '.h', '.cpp', '.cc', '.cxx', '.hpp', '.hh'):
+        # Quoted includes only: <system> headers are external
+        return ImportScanner(
+            r'^[ \t]*#[ \t]*include[ \t]*"([^"\n]+)"',
+            _c_imports,
+            anchors=("include",),
+            line_anchored=True
+        )
+    return None
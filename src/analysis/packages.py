@@ -0,0 +1,169 @@
+import re
+import json
+import math
+import fnmatch
+import tomllib
+import posixpath
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterable, Set
+
+from src.analysis.pagerank import CSRGraph, pagerank
+from src.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Manifests that make their directory a package root
+PACKAGE_MARKERS = {
+    'package.json', 'pyproject.toml', 'setup.py', 'go.mod', 'Cargo.toml',
+    'pom.xml', 'build.gradle', 'build.gradle.kts',
+}
+# Files that can declare workspace members (package.json "workspaces", go.work "use", ...)
+WORKSPACE_FILES = {'package.json', 'pnpm-workspace.yaml', 'lerna.json', 'go.work', 'Cargo.toml', 'pyproject.toml'}
+# Package share of the budget: this much by package-graph rank, the rest by sqrt(file count)
+PACKAGE_RANK_WEIGHT = 0.5
+
+
+@dataclass
+class Package:
+    """One shard of a monorepo: a package root and the files it owns."""
+    root: str                      # Root-relative directory ("" for files outside any package)
+    files: List[str] = field(default_factory=list)
+    rank: float = 0.0              # PageRank in the package-level graph
+    share: float = 0.0             # Share of the budget (and of the total file rank)
+
+    @property
+    def name(self) -> str:
+        return self.root or "."
+
+
+def find_package_roots(rel_paths: Iterable[str]) -> List[str]:
+    """Directories holding a package manifest, deepest first."""
+    roots = {posixpath.dirname(p) for p in rel_paths if posixpath.basename(p) in PACKAGE_MARKERS}
+    return sorted(roots, key=lambda r: (-r.count("/"), r))
+
+
+def _workspace_globs(name: str, text: str) -> List[str]:
+    """Member globs one workspace file declares, relative to its directory."""
+    try:
+        if name == 'package.json':
+            workspaces = json.loads(text).get("workspaces") or []
+            return list(workspaces.get("packages", []) if isinstance(workspaces, dict) else workspaces)
+        if name == 'lerna.json':
+            return list(json.loads(text).get("packages") or [])
+        if name == 'pnpm-workspace.yaml':
+            block = re.search(r'^packages:\s*\n((?:[ \t]*(?:-.*|#.*)?\n?)*)', text, re.M)
+            return re.findall(r'^\s*-\s*[\'"]?([^\'"#\s]+)', block.group(1), re.M) if block else []
+        if name == 'go.work':
+            return re.findall(r'^\s*(?:use\s+)?\(?\s*(\.{1,2}/[^\s)]*|\.)\s*\)?\s*$', text, re.M)
+        if name == 'Cargo.toml':
+            return list(tomllib.loads(text).get("workspace", {}).get("members", []))
+        if name == 'pyproject.toml':
+            tool = tomllib.loads(text).get("tool", {})
+            return list(tool.get("uv", {}).get("workspace", {}).get("members", []))
+    except Exception as e:
+        logger.debug(f"Unreadable workspace file {name}: {e}")
+    return []
+
+
+def workspace_members(manifests: Dict[str, str], roots: Iterable[str]) -> Set[str]:
+    """
+    Package roots declared as members by a workspace file. `manifests` maps the
+    root-relative path of each workspace file to its text.
+    """
+    globs = []
+    for rel, text in manifests.items():
+        base = posixpath.dirname(rel)
+        for glob in _workspace_globs(posixpath.basename(rel), text):
+            if isinstance(glob, str) and not glob.startswith("!"):
+                globs.append(posixpath.normpath(posixpath.join(base, glob.rstrip("/"))))
+    return {r for r in roots if r and any(fnmatch.fnmatch(r, g) for g in globs)}
+
+
+def member_roots(roots: List[str], members: Set[str], files: Dict[str, str], min_files: int) -> List[str]:
+    """
+    Nested roots that are real packages: declared workspace members, or owning
+    at least `min_files` analyzed files (so a docs/ or fixture manifest isn't one).
+    The top-level root is always kept.
+    """
+    counts = {r: 0 for r in roots}
+    nested = [r for r in roots if r]
+    for rel in files.values():
+        owner = next((r for r in nested if rel.startswith(r + "/")), "")
+        counts[owner] = counts.get(owner, 0) + 1
+    return [r for r in roots if not r or r in members or counts[r] >= min_files]
+
+
+def split_packages(files: Dict[str, str], roots: List[str]) -> List[Package]:
+    """
+    Assigns each file (id -> root-relative path) to the deepest package root
+    containing it. Files outside every nested package form the "" package.
+    """
+    packages = {root: Package(root) for root in roots}
+    packages.setdefault("", Package(""))
+    nested = [r for r in roots if r]
+    for f, rel in files.items():
+        owner = next((r for r in nested if rel.startswith(r + "/")), "")
+        packages[owner].files.append(f)
+    return [p for p in packages.values() if p.files]
+
+
+def _rank(nodes: List[str], adjacency: Dict[str, Iterable[str]]) -> Dict[str, float]:
+    return pagerank(
+        CSRGraph.from_adjacency(nodes, adjacency),
+        alpha=0.85,
+        tol=config.PAGERANK_TOLERANCE,
+        max_iter=config.PAGERANK_MAX_ITER
+    )
+
+
+def rank_shards(packages: List[Package], edges: Dict[str, List[str]]) -> Dict[str, float]:
+    """
+    Ranks every package as its own shard and merges the results.
+
+    Each package gets PageRank over its internal edges only, so one huge
+    package can't drain rank from the rest. Cross-package edges form a
+    package-level graph whose rank, blended with package size, sets each
+    package's share. A file's final score is its package's share times its
+    rank inside the package (scores still sum to 1). Only ranking and the
+    budget split are per package; files are parsed and packed as one repo.
+    """
+    owner = {f: p.root for p in packages for f in p.files}
+
+    def rank_package(package: Package) -> Dict[str, float]:
+        members = set(package.files)
+        internal = {f: [t for t in edges.get(f, ()) if t in members] for f in package.files}
+        return _rank(package.files, internal)
+
+    # Short numpy runs: threads would only add overhead under the GIL
+    shard_ranks = [rank_package(p) for p in packages]
+
+    package_edges: Dict[str, set] = {p.root: set() for p in packages}
+    for f, targets in edges.items():
+        source = owner.get(f)
+        if source is None:
+            continue
+        for t in targets:
+            target = owner.get(t)
+            if target is not None and target != source:
+                package_edges[source].add(target)
+    package_rank = _rank([p.root for p in packages], package_edges)
+
+    sizes = {p.root: math.sqrt(len(p.files)) for p in packages}
+    total_size = sum(sizes.values()) or 1.0
+    ranks: Dict[str, float] = {}
+    for package, within in zip(packages, shard_ranks):
+        package.rank = package_rank.get(package.root, 0.0)
+        package.share = PACKAGE_RANK_WEIGHT * package.rank + (1 - PACKAGE_RANK_WEIGHT) * sizes[package.root] / total_size
+        for f, score in within.items():
+            ranks[f] = package.share * score
+    return ranks
+
+
+def shard_summary(packages: List[Package], limit: int = 20) -> str:
+    """One line per package (largest share first) for the repository map header."""
+    ordered = sorted(packages, key=lambda p: -p.share)
+    lines = [f"- {p.name} ({len(p.files)} files, {p.share:.0%} of budget)" for p in ordered[:limit]]
+    if len(ordered) > limit:
+        lines.append(f"- ... {len(ordered) - limit} more")
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Relative value of each representation of the same file
+REPRESENTATION_WEIGHTS = {
+    "path": 0.05,      # Path listed under "other files"
+    "names": 0.4,      # Definition names only
+    "symbols": 1.0,    # Most referenced definitions with docstrings (scaled by their share)
+    "skeleton": 1.0,   # Definitions with docstrings
+    "full": 1.25,      # Full (possibly truncated) text
+}
+
+
+@dataclass
+class Representation:
+    """One way of showing a file in the repository map, with its token cost."""
+    kind: str
+    text: str
+    tokens: int
+    share: float = 1.0  # Fraction of the kind's weight this option is worth (partial views)
+
+
+@dataclass
+class FileCandidate:
+    """A file competing for context budget, with every representation it offers."""
+    path: str
+    rank: float
+    options: List[Representation] = field(default_factory=list)
+    boost: float = 1.0  # Extra weight, e.g. for essential config files
+
+    def value(self, option: Representation, weights: Dict[str, float] = REPRESENTATION_WEIGHTS) -> float:
+        return self.rank * self.boost * weights.get(option.kind, 0.0) * option.share
+
+
+def _upgrade_steps(candidate: FileCandidate, weights: Dict[str, float]) -> List[Tuple[float, int, Representation]]:
+    """
+    Upper convex hull of the candidate's (tokens, value) options, as a list of
+    (marginal cost, marginal value, option) steps with decreasing efficiency.
+    """
+    points = sorted(
+        (opt for opt in candidate.options if opt.tokens > 0),
+        key=lambda opt: (opt.tokens, -candidate.value(opt, weights))
+    )
+    hull: List[Tuple[int, float, Optional[Representation]]] = [(0, 0.0, None)]
+    for opt in points:
+        value = candidate.value(opt, weights)
+        if value <= hull[-1][1]:
+            continue  # Costs more, worth no more
+        while len(hull) >= 2:
+            (c0, v0, _), (c1, v1, _) = hull[-2], hull[-1]
+            # Drop the middle point if it lies under the line to the new one
+            if (v1 - v0) * (opt.tokens - c1) <= (value - v1) * (c1 - c0):
+                hull.pop()
+            else:
+                break
+        hull.append((opt.tokens, value, opt))
+
+    return [
+        (hull[i][0] - hull[i - 1][0], hull[i][1] - hull[i - 1][1], hull[i][2])
+        for i in range(1, len(hull))
+    ]
+
+
+def pack(
+    candidates: List[FileCandidate],
+    budget: int,
+    groups: Optional[Dict[str, str]] = None,
+    group_budgets: Optional[Dict[str, int]] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> Dict[str, Representation]:
+    """
+    Chooses at most one representation per file to maximize total value
+    (rank x representation weight) within `budget` tokens.
+
+    Greedy multiple-choice knapsack: take upgrade steps across all files in
+    order of value per token, skipping steps that no longer fit instead of
+    stopping, then spend leftovers on any upgrade that still fits.
+
+    With `groups` (path -> group) and `group_budgets`, the first pass keeps
+    each group within its own budget; a second pass then lets any group use
+    what the others left over.
+
+    `weights` replaces REPRESENTATION_WEIGHTS (e.g. for a view that prefers
+    outlines over full text).
+
+    Returns:
+        Chosen representation per file path (files left out are absent)
+    """
+    weights = weights or REPRESENTATION_WEIGHTS
+    steps = []
+    for idx, candidate in enumerate(candidates):
+        for level, (cost, gain, opt) in enumerate(_upgrade_steps(candidate, weights)):
+            steps.append((gain / cost, idx, level, cost, opt))
+    steps.sort(key=lambda s: (-s[0], s[1], s[2]))
+
+    levels = [0] * len(candidates)
+    chosen: Dict[int, Representation] = {}
+    used = 0
+    passes = [False]
+    if groups and group_budgets:
+        group_of = [groups.get(c.path) for c in candidates]
+        group_used = {g: 0 for g in group_budgets}
+        passes = [True, False]
+    for capped in passes:
+        for _, idx, level, cost, opt in steps:
+            # Steps of a file must be taken in order; a skipped step blocks the rest
+            if levels[idx] != level:
+                continue
+            if used + cost > budget:
+                levels[idx] = -1
+                continue
+            if capped:
+                group = group_of[idx]
+                if group in group_used:
+                    if group_used[group] + cost > group_budgets[group]:
+                        # Over the group's budget: retried in the uncapped pass
+                        continue
+                    group_used[group] += cost
+            used += cost
+            levels[idx] += 1
+            chosen[idx] = opt
+
+    # Fill: off-hull options can still use the leftover budget
+    for idx, candidate in enumerate(candidates):
+        current = chosen.get(idx)
+        current_cost = current.tokens if current else 0
+        current_value = candidate.value(current, weights) if current else 0.0
+        best = None
+        for opt in candidate.options:
+            extra = opt.tokens - current_cost
+            value = candidate.value(opt, weights)
+            if value > current_value and used + extra <= budget:
+                if best is None or value > candidate.value(best, weights):
+                    best = opt
+        if best is not None:
+            used += best.tokens - current_cost
+            chosen[idx] = best
+
+    logger.info(f"Packed {len(chosen)}/{len(candidates)} files into {used}/{budget} tokens.")
+    return {candidates[idx].path: opt for idx, opt in chosen.items()}
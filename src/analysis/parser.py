@@ -1,11 +1,189 @@
 import os
-from typing import List, Dict, Any
+import re
+import json
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
 import logging
 from tree_sitter_languages import get_language, get_parser
-from src.utils import safe_read_file
+from src.analysis.snapshot import FileSnapshot, read_snapshot
+from src.analysis.imports import get_scanner
 
 logger = logging.getLogger(__name__)
 
+# Byte cap for the head-of-file fallback (minified lines can be huge)
+FALLBACK_MAX_BYTES = 8 * 1024
+
+# Identifiers shorter than this are mostly noise when matched against definitions
+MIN_REFERENCE_LENGTH = 3
+# Composite identifier nodes (their parts are captured on their own) and labels
+_NON_REFERENCE_KINDS = re.compile(r'^(scoped|nested|qualified)_|^(blank|statement)_identifier$')
+
+# Suffixes stripped from tree-sitter node types for compact outlines
+_KIND_SUFFIXES = re.compile(r'_(definition|declaration|declarator|item|specifier|spec)$')
+
+
+@dataclass
+class Definition:
+    """A top-level or nested definition found in a file."""
+    kind: str   # tree-sitter node type, e.g. "class_definition"
+    name: str
+    doc: str = ""
+
+    @property
+    def short_kind(self) -> str:
+        return _KIND_SUFFIXES.sub("", self.kind)
+
+
+@dataclass
+class FileSkeleton:
+    """
+    Structured skeleton of a file. Renders at several resolutions so the
+    context packer can trade detail for tokens.
+    """
+    definitions: List[Definition] = field(default_factory=list)
+    fallback: str = ""  # Head of the file when no definitions could be extracted
+
+    def render(self) -> str:
+        """Definitions with their docstrings (the classic skeleton)."""
+        if not self.definitions:
+            return self.fallback
+        lines = []
+        for d in self.definitions:
+            line = f"{d.kind} {d.name}"
+            if d.doc:
+                line += f"\n  \"\"\" {d.doc[:100]}... \"\"\""
+            lines.append(line)
+        return "\n".join(lines)
+
+    def render_names(self) -> str:
+        """Definition names only, on a single line. Empty for fallback skeletons."""
+        return ", ".join(f"{d.short_kind} {d.name}" for d in self.definitions)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "definitions": [[d.kind, d.name, d.doc] for d in self.definitions],
+            "fallback": self.fallback,
+        }
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "FileSkeleton":
+        return cls(
+            definitions=[Definition(*d) for d in raw.get("definitions", [])],
+            fallback=raw.get("fallback", ""),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, data: str) -> "FileSkeleton":
+        return cls.from_dict(json.loads(data))
+
+
+@dataclass
+class FileAnalysis:
+    """
+    Everything one parse of a file yields: its skeleton for the repository map,
+    its raw import strings for the dependency graph and the identifiers it uses
+    for the symbol index.
+    """
+    skeleton: FileSkeleton = field(default_factory=FileSkeleton)
+    imports: List[str] = field(default_factory=list)
+    references: List[str] = field(default_factory=list)  # Distinct identifiers not defined here
+
+    def outline(self) -> "FileAnalysis":
+        """Copy without skeleton text (docstrings, fallback head): imports, definition names and references."""
+        definitions = [Definition(d.kind, d.name) for d in self.skeleton.definitions]
+        return FileAnalysis(FileSkeleton(definitions), self.imports, self.references)
+
+    def to_json(self) -> str:
+        return json.dumps({"skeleton": self.skeleton.to_dict(), "imports": self.imports, "references": self.references})
+
+    @classmethod
+    def from_json(cls, data: str) -> "FileAnalysis":
+        raw = json.loads(data)
+        return cls(FileSkeleton.from_dict(raw.get("skeleton", {})), raw.get("imports", []), raw.get("references", []))
+
+
+def _reference_query(language) -> str:
+    """Query capturing every identifier node of a grammar (keywords are anonymous nodes)."""
+    kinds = sorted({
+        language.node_kind_for_id(i) for i in range(language.node_kind_count)
+        if language.node_kind_is_named(i)
+    })
+    kinds = [k for k in kinds if k.endswith("identifier") and not _NON_REFERENCE_KINDS.search(k)]
+    return "[" + " ".join(f"({k})" for k in kinds) + "] @reference"
+
+
+def _python_import_strings(node, snapshot: FileSnapshot) -> List[str]:
+    """Import strings of a Python import statement, in the import scanner's format."""
+    text = lambda n: snapshot.decode(n.start_byte, n.end_byte)
+    names = []
+    for name in node.children_by_field_name("name"):
+        if name.type == "aliased_import":
+            name = name.child_by_field_name("name")
+        if name is not None:
+            names.append(text(name))
+    if node.type == "import_statement":
+        return names
+
+    module = node.child_by_field_name("module_name")
+    if module is None:
+        return []
+    module = text(module)
+    # "from pkg import mod" may name a submodule (see imports._python_imports)
+    sep = "" if module.endswith(".") else "."
+    return [f"{module}{sep}{n}" for n in names] or [module]
+
+
+def _rust_use_paths(node, snapshot: FileSnapshot, prefix: str = "") -> List[str]:
+    """Paths named by a Rust use tree: "a::b::{c, d::e}" -> a::b::c, a::b::d::e."""
+    text = lambda n: snapshot.decode(n.start_byte, n.end_byte)
+    join = lambda path: f"{prefix}::{path}" if prefix and path else prefix or path
+    if node.type == "use_as_clause":
+        path = node.child_by_field_name("path")
+        return [join(text(path))] if path is not None else []
+    if node.type == "use_wildcard":
+        # "a::b::*" names module a::b
+        path = node.named_children[0] if node.named_children else None
+        return [join(text(path))] if path is not None else ([prefix] if prefix else [])
+    if node.type == "scoped_use_list":
+        path = node.child_by_field_name("path")
+        items = node.child_by_field_name("list")
+        prefix = join(text(path)) if path is not None else prefix
+        return _rust_use_paths(items, snapshot, prefix) if items is not None else [prefix]
+    if node.type == "use_list":
+        paths = []
+        for item in node.named_children:
+            if item.type == "self":
+                paths.append(prefix)
+            else:
+                paths.extend(_rust_use_paths(item, snapshot, prefix))
+        return [p for p in paths if p]
+    return [join(text(node))]
+
+
+def _java_import_path(node, snapshot: FileSnapshot) -> List[str]:
+    """Dotted name of a Java import, with ".*" kept for wildcard imports."""
+    names = [c for c in node.named_children if c.type in ("scoped_identifier", "identifier")]
+    if not names:
+        return []
+    path = snapshot.decode(names[0].start_byte, names[0].end_byte)
+    if any(c.type == "asterisk" for c in node.children):
+        path += ".*"
+    return [path]
+
+
+_COMMENT_MARKERS = re.compile(r'^\s*(?:/\*+!?|\*+/|\*(?!/)|//[/!]?|#)?\s?|\s*\*+/\s*$', re.MULTILINE)
+
+
+def _clean_comment(text: str) -> str:
+    """Comment body without its markers (//, ///, /** */, leading *), on one line."""
+    return " ".join(line.strip() for line in _COMMENT_MARKERS.sub("", text).splitlines() if line.strip())
+
+
 class CodeParser:
     """
     Uses Tree-sitter to parse code and extract high-level definitions (skeletons).
@@ -15,15 +193,29 @@ class CodeParser:
         '.py': 'python',
         '.js': 'javascript',
         '.jsx': 'javascript',
+        '.mjs': 'javascript',
+        '.cjs': 'javascript',
         '.ts': 'typescript',
-        '.tsx': 'typescript',
+        '.tsx': 'tsx',
         '.go': 'go',
         '.rs': 'rust',
         '.java': 'java',
-        '.cpp': 'cpp',
         '.c': 'c',
+        '.cpp': 'cpp',
+        '.cc': 'cpp',
+        '.cxx': 'cpp',
+        '.h': 'cpp',
+        '.hh': 'cpp',
+        '.hpp': 'cpp',
     }
     
+    # Bump whenever QUERIES, IMPORT_QUERIES or skeleton formatting change (invalidates cached analyses)
+    VERSION = "7"
+
+    # Languages whose docstrings sit inside the definition body; elsewhere
+    # doc comments precede the definition they describe
+    DOC_INSIDE = {'python'}
+    
     # Improved Queries with Docstring Capture
     QUERIES = {
         'python': """
@@ -37,98 +229,347 @@ class CodeParser:
         'javascript': """
             (comment) @doc
             (function_declaration name: (identifier) @name) @function
+            (generator_function_declaration name: (identifier) @name) @function
             (class_declaration name: (identifier) @name) @class
-            (variable_declarator name: (identifier) @name value: [(arrow_function) (function_expression)]) @function
+            (method_definition name: (property_identifier) @name) @method
+            (variable_declarator name: (identifier) @name value: [(arrow_function) (function)]) @function
         """,
         'typescript': """
             (comment) @doc
             (function_declaration name: (identifier) @name) @function
-            (class_declaration name: (identifier) @name) @class
+            (generator_function_declaration name: (identifier) @name) @function
+            (class_declaration name: (type_identifier) @name) @class
+            (abstract_class_declaration name: (type_identifier) @name) @class
+            (method_definition name: (property_identifier) @name) @method
             (interface_declaration name: (type_identifier) @name) @interface
-            (variable_declarator name: (identifier) @name value: [(arrow_function) (function_expression)]) @function
-        """
+            (type_alias_declaration name: (type_identifier) @name) @type
+            (enum_declaration name: (identifier) @name) @enum
+            (variable_declarator name: (identifier) @name value: [(arrow_function) (function)]) @function
+        """,
+        'go': """
+            (comment) @doc
+            (function_declaration name: (identifier) @name) @function
+            (method_declaration name: (field_identifier) @name) @method
+            (type_spec name: (type_identifier) @name) @type
+        """,
+        'rust': """
+            (line_comment) @doc
+            (block_comment) @doc
+            (function_item name: (identifier) @name) @function
+            (function_signature_item name: (identifier) @name) @function
+            (struct_item name: (type_identifier) @name) @struct
+            (enum_item name: (type_identifier) @name) @enum
+            (union_item name: (type_identifier) @name) @union
+            (trait_item name: (type_identifier) @name) @trait
+            (impl_item type: (_) @name) @impl
+            (type_item name: (type_identifier) @name) @type
+            (mod_item name: (identifier) @name) @module
+            (macro_definition name: (identifier) @name) @macro
+        """,
+        'java': """
+            (block_comment) @doc
+            (line_comment) @doc
+            (class_declaration name: (identifier) @name) @class
+            (interface_declaration name: (identifier) @name) @interface
+            (enum_declaration name: (identifier) @name) @enum
+            (record_declaration name: (identifier) @name) @record
+            (annotation_type_declaration name: (identifier) @name) @annotation
+            (method_declaration name: (identifier) @name) @method
+            (constructor_declaration name: (identifier) @name) @constructor
+        """,
+        'c': """
+            (comment) @doc
+            (function_definition declarator: (function_declarator declarator: (identifier) @name)) @function
+            (function_definition declarator: (pointer_declarator declarator: (function_declarator declarator: (identifier) @name))) @function
+            (declaration declarator: (function_declarator declarator: (identifier) @name)) @prototype
+            (struct_specifier name: (type_identifier) @name body: (_)) @struct
+            (union_specifier name: (type_identifier) @name body: (_)) @union
+            (enum_specifier name: (type_identifier) @name body: (_)) @enum
+            (type_definition declarator: (type_identifier) @name) @type
+            (preproc_function_def name: (identifier) @name) @macro
+        """,
+        'cpp': """
+            (comment) @doc
+            (function_definition declarator: (function_declarator declarator: [(identifier) (field_identifier) (qualified_identifier) (destructor_name) (operator_name)] @name)) @function
+            (function_definition declarator: (pointer_declarator declarator: (function_declarator declarator: [(identifier) (qualified_identifier)] @name))) @function
+            (function_definition declarator: (reference_declarator (function_declarator declarator: [(identifier) (qualified_identifier)] @name))) @function
+            (declaration declarator: (function_declarator declarator: [(identifier) (qualified_identifier)] @name)) @prototype
+            (field_declaration declarator: (function_declarator declarator: [(field_identifier) (destructor_name) (operator_name)] @name)) @method
+            (class_specifier name: (type_identifier) @name body: (_)) @class
+            (struct_specifier name: (type_identifier) @name body: (_)) @struct
+            (union_specifier name: (type_identifier) @name body: (_)) @union
+            (enum_specifier name: (type_identifier) @name body: (_)) @enum
+            (type_definition declarator: (type_identifier) @name) @type
+            (alias_declaration name: (type_identifier) @name) @type
+            (preproc_function_def name: (identifier) @name) @macro
+        """,
+    }
+    QUERIES['tsx'] = QUERIES['typescript']
+
+    # Import nodes, matched in the same pass as QUERIES. "@import" captures a
+    # module specifier (quotes stripped); other "@import.*" captures are
+    # statements that need a language-specific walk.
+    IMPORT_QUERIES = {
+        'python': """
+            (import_statement) @import.python
+            (import_from_statement) @import.python
+        """,
+        'javascript': """
+            (import_statement source: (string) @import)
+            (export_statement source: (string) @import)
+            (call_expression function: (identifier) @import.require arguments: (arguments . (string) @import.call))
+            (call_expression function: (import) arguments: (arguments . (string) @import))
+        """,
+        'typescript': """
+            (import_statement source: (string) @import)
+            (import_require_clause source: (string) @import)
+            (export_statement source: (string) @import)
+            (call_expression function: (identifier) @import.require arguments: (arguments . (string) @import.call))
+            (call_expression function: (import) arguments: (arguments . (string) @import))
+        """,
+        'go': """
+            (import_spec path: (_) @import)
+        """,
+        'rust': """
+            (use_declaration argument: (_) @import.rust)
+            (mod_item name: (identifier) @import !body)
+        """,
+        'java': """
+            (import_declaration) @import.java
+        """,
+        # Quoted includes only: <system> headers are external
+        'c': """
+            (preproc_include path: (string_literal) @import)
+        """,
+        'cpp': """
+            (preproc_include path: (string_literal) @import)
+        """,
     }
+    IMPORT_QUERIES['tsx'] = IMPORT_QUERIES['typescript']
 
     def __init__(self):
-        self.parsers = {}
+        # Languages and compiled queries are immutable once built and shared by
+        # all threads; tree-sitter Parser objects are not, so each thread gets its own
         self.languages = {}
+        self.queries = {}
+        self.reference_queries = {}
+        self._unavailable = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Per-language [files parsed, seconds]
+        self._stats: Dict[str, List[float]] = {}
+
+    def _get_language(self, lang_name: str):
+        """Grammar and compiled query for a language, loaded once under the lock."""
+        if lang_name in self.queries:
+            return self.languages[lang_name]
+        with self._lock:
+            if lang_name in self._unavailable:
+                return None
+            if lang_name not in self.queries:
+                try:
+                    language = get_language(lang_name)
+                    query_scm = self.QUERIES[lang_name] + self.IMPORT_QUERIES.get(lang_name, "")
+                    self.languages[lang_name] = language
+                    self.reference_queries[lang_name] = language.query(_reference_query(language))
+                    # Published last: other threads check `queries` without the lock
+                    self.queries[lang_name] = language.query(query_scm)
+                except Exception as e:
+                    logger.warning(f"Could not load parser for {lang_name}: {e}")
+                    self._unavailable.add(lang_name)
+                    return None
+        return self.languages[lang_name]
 
     def _get_parser(self, lang_name: str):
-        if lang_name not in self.parsers:
+        """This thread's parser for a language (None if the grammar can't be loaded)."""
+        if self._get_language(lang_name) is None:
+            return None
+        parsers = getattr(self._local, "parsers", None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+        parser = parsers.get(lang_name)
+        if parser is None:
             try:
-                self.parsers[lang_name] = get_parser(lang_name)
-                self.languages[lang_name] = get_language(lang_name)
+                parser = parsers[lang_name] = get_parser(lang_name)
             except Exception as e:
                 logger.warning(f"Could not load parser for {lang_name}: {e}")
                 return None
-        return self.parsers.get(lang_name)
+        return parser
+
+    def _record(self, lang_name: str, seconds: float):
+        with self._lock:
+            stats = self._stats.setdefault(lang_name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+
+    def stats(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        """Files parsed and parse + query seconds per language since the last reset."""
+        with self._lock:
+            stats = {lang: {"files": n, "seconds": s} for lang, (n, s) in self._stats.items()}
+            if reset:
+                self._stats.clear()
+        return stats
 
-    def parse_file(self, file_path: str) -> str:
+    def parse_file(self, file_path: str, snapshot: Optional[FileSnapshot] = None) -> str:
         """
         Parses a file and returns a skeleton string of definitions including docstrings.
         """
+        return self.extract_skeleton(file_path, snapshot).render()
+
+    def extract_skeleton(self, file_path: str, snapshot: Optional[FileSnapshot] = None) -> FileSkeleton:
+        """
+        Parses a file and returns its structured skeleton (definitions + docstrings).
+        Falls back to the head of the file for unsupported or unparseable files.
+
+        Pass a `snapshot` to reuse bytes already read by an earlier stage.
+        """
+        return self.analyze(file_path, snapshot).skeleton
+
+    def analyze(
+        self,
+        file_path: str,
+        snapshot: Optional[FileSnapshot] = None,
+        references: bool = True
+    ) -> FileAnalysis:
+        """
+        Parses a file once and returns its skeleton together with its imports.
+
+        Definitions, docstrings and import nodes all come from a single query over
+        a single tree. Files without a grammar or query (or that fail to parse)
+        get the fallback skeleton and regex-scanned imports. `references` (the
+        identifiers used, for symbol ranking) costs a second walk of the tree
+        and is skipped when False.
+        """
+        if snapshot is None:
+            snapshot = read_snapshot(file_path)
+        if snapshot is None:
+            return FileAnalysis()
+
         ext = os.path.splitext(file_path)[1]
         lang_name = self.SUPPORTED_LANGUAGES.get(ext)
         
         if not lang_name:
-            return self._fallback_read(file_path)
+            return self._fallback_analysis(ext, snapshot)
 
         parser = self._get_parser(lang_name)
         if not parser:
-            return self._fallback_read(file_path)
+            return self._fallback_analysis(ext, snapshot)
 
         try:
-            content = safe_read_file(file_path)
-            
-            tree = parser.parse(bytes(content, "utf8"))
-            query_scm = self.QUERIES.get(lang_name)
-            
-            if not query_scm:
-                 return content
-            
-            # Execute query
-            query = self.languages[lang_name].query(query_scm)
-            captures = query.captures(tree.root_node)
+            start = time.perf_counter()
+            tree = parser.parse(snapshot.as_bytes())
+
+            # Execute query (definitions and imports in one pass)
+            captures = self.queries[lang_name].captures(tree.root_node)
+            self._record(lang_name, time.perf_counter() - start)
+            doc_inside = lang_name in self.DOC_INSIDE
             
             definitions = []
+            def_nodes = []
+            imports = []
             last_doc = None
+            outer = None
+            require_call = False
             
             for node, capture_name in captures:
+                # Capture Imports
+                if capture_name.startswith('import'):
+                    if capture_name == 'import.require':
+                        require_call = snapshot.decode(node.start_byte, node.end_byte) == "require"
+                    elif capture_name == 'import.python':
+                        imports.extend(_python_import_strings(node, snapshot))
+                    elif capture_name == 'import.rust':
+                        imports.extend(_rust_use_paths(node, snapshot))
+                    elif capture_name == 'import.java':
+                        imports.extend(_java_import_path(node, snapshot))
+                    elif capture_name == 'import' or (capture_name == 'import.call' and require_call):
+                        imports.append(snapshot.decode(node.start_byte, node.end_byte).strip("'\"`<>"))
+                    continue
+
                 # Capture Docstrings
                 if capture_name == 'doc':
-                    last_doc = content[node.start_byte:node.end_byte].strip()
+                    doc = snapshot.decode(node.start_byte, node.end_byte).strip()
+                    if doc_inside:
+                        # Docstring inside the previous definition's body (Python style)
+                        if def_nodes and def_nodes[-1].start_byte < node.start_byte < def_nodes[-1].end_byte:
+                            if not definitions[-1].doc:
+                                definitions[-1].doc = doc
+                        continue
+                    doc = _clean_comment(doc)
+                    # Consecutive line comments form one block
+                    if last_doc and node.start_point[0] - last_doc[1] == 1:
+                        doc = f"{last_doc[0]} {doc}".strip()
+                    last_doc = (doc, node.end_point[0])
                     continue
                 
                 # Capture Definitions
-                if capture_name in ['name', 'function', 'class', 'interface']:
-                    # We usually get 'name' then the full node. Let's focus on the name for brevity.
-                    if capture_name == 'name':
-                        def_name = content[node.start_byte:node.end_byte]
-                        parent_type = node.parent.type if node.parent else "unknown"
-                        
-                        line = f"{parent_type} {def_name}"
-                        if last_doc:
-                            # Attach the docstring if it was immediately preceding (simplistic heuristic)
-                            line += f"\n  \"\"\" {last_doc[:100]}... \"\"\""
-                            last_doc = None # Reset
-                        
-                        definitions.append(line)
+                # We usually get the full node then 'name'. Focus on the name for brevity.
+                if capture_name == 'name':
+                    def_name = snapshot.decode(node.start_byte, node.end_byte)
+                    # The definition node captured just before its name; the name may be
+                    # nested below it (C declarators), so node.parent is only a fallback
+                    if outer is not None and outer.start_byte <= node.start_byte < outer.end_byte:
+                        def_node = outer
+                    else:
+                        def_node = node.parent
+                    outer = None
+                    parent_type = def_node.type if def_node else "unknown"
+                    
+                    definition = Definition(parent_type, def_name)
+                    # Attach a comment only if it ends right above the definition
+                    if last_doc and def_node and 0 <= def_node.start_point[0] - last_doc[1] <= 2:
+                        definition.doc = last_doc[0]
+                    last_doc = None # Reset
+                    
+                    definitions.append(definition)
+                    def_nodes.append(def_node)
+                else:
+                    outer = node
 
+            imports = list(dict.fromkeys(imports))
+            if lang_name not in self.IMPORT_QUERIES:
+                imports = self._scan_imports(ext, snapshot)
+            references = self._references(lang_name, tree, snapshot, definitions) if references else []
             if not definitions:
-                return self._fallback_read(file_path)
+                return FileAnalysis(FileSkeleton(fallback=self._fallback_read(snapshot)), imports, references)
                 
-            return "\n".join(definitions)
+            return FileAnalysis(FileSkeleton(definitions=definitions), imports, references)
 
         except Exception as e:
             logger.error(f"Error parsing {file_path}: {e}")
-            return self._fallback_read(file_path)
+            return self._fallback_analysis(ext, snapshot)
 
-    def _fallback_read(self, file_path: str) -> str:
-        """Reads first 100 lines as fallback."""
+    def _scan_imports(self, ext: str, snapshot: FileSnapshot) -> List[str]:
+        """Regex import scan for files the queries don't cover."""
+        scanner = get_scanner(ext)
         try:
-            content = safe_read_file(file_path, max_lines=100)
-            if content:
-                return content
-            return ""
+            return scanner.scan(snapshot) if scanner else []
+        except Exception:
+            return []
+
+    def _references(self, lang_name: str, tree, snapshot: FileSnapshot, definitions: List[Definition]) -> List[str]:
+        """
+        Distinct identifiers the file uses but doesn't define itself. Only
+        identifier nodes count, so keywords, strings and comments never do.
+        """
+        names = dict.fromkeys(
+            snapshot.decode(node.start_byte, node.end_byte)
+            for node, _ in self.reference_queries[lang_name].captures(tree.root_node)
+            if node.end_byte - node.start_byte >= MIN_REFERENCE_LENGTH
+        )
+        for d in definitions:
+            names.pop(d.name, None)
+        return list(names)
+
+    def _fallback_analysis(self, ext: str, snapshot: FileSnapshot) -> FileAnalysis:
+        return FileAnalysis(
+            FileSkeleton(fallback=self._fallback_read(snapshot)),
+            self._scan_imports(ext, snapshot)
+        )
+
+    def _fallback_read(self, snapshot: FileSnapshot) -> str:
+        """Reads first 100 lines (at most FALLBACK_MAX_BYTES) as fallback."""
+        try:
+            return snapshot.head(100, max_bytes=FALLBACK_MAX_BYTES)
         except Exception:
             return ""
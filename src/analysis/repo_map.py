@@ -0,0 +1,55 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+
+from src.utils import count_tokens
+
+
+@dataclass
+class Segment:
+    """A rendered piece of the repository map with its token count."""
+    kind: str          # "header", "full", "skeleton", "symbols", "names", "path", ...
+    text: str
+    tokens: int
+    path: str = ""     # Root-relative path ("" for structural segments)
+    rank: float = 0.0
+
+
+@dataclass
+class RepositoryMap:
+    """
+    Ordered segments of the repository map. Each segment carries its own token
+    count for packing; `total_tokens` counts the joined text once, since tokens
+    can merge across segment boundaries.
+    """
+    name: str
+    total_files: int
+    segments: List[Segment] = field(default_factory=list)
+    # Smaller maps packed from the same candidates, by name (see analysis.views)
+    views: Dict[str, "RepositoryMap"] = field(default_factory=dict)
+    _rendered: Optional[str] = field(default=None, init=False, repr=False)
+    _tokens: Optional[int] = field(default=None, init=False, repr=False)
+
+    def add(self, segment: Segment):
+        self.segments.append(segment)
+        self._rendered = None
+        self._tokens = None
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens of the rendered map."""
+        if self._tokens is None:
+            self._tokens = count_tokens(self.render())
+        return self._tokens
+
+    @property
+    def files(self) -> List[str]:
+        """Paths included in the map, in order."""
+        return [seg.path for seg in self.segments if seg.path]
+
+    def render(self) -> str:
+        if self._rendered is None:
+            self._rendered = "".join(seg.text for seg in self.segments)
+        return self._rendered
+
+    def __str__(self) -> str:
+        return self.render()
@@ -0,0 +1,370 @@
+import os
+import re
+import json
+import posixpath
+import logging
+from typing import List, Dict, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Directory names that act as Python import roots (src-layout and friends)
+PYTHON_SOURCE_DIRS = {'src', 'lib', 'python'}
+JS_EXTENSIONS = ['.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs', '.d.ts']
+C_EXTENSIONS = ('.c', '.h', '.cpp', '.cc', '.cxx', '.hpp', '.hh', '.hxx', '.inl', '.inc')
+# Files whose content changes how imports resolve
+RESOLUTION_CONFIG_FILES = {'tsconfig.json', 'jsconfig.json', 'package.json', 'go.mod', 'Cargo.toml'}
+
+_JSON_COMMENTS = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_JSON_TRAILING_COMMAS = re.compile(r',(\s*[}\]])')
+_GO_MODULE = re.compile(r'^\s*module\s+(\S+)', re.MULTILINE)
+
+
+def _parse_json(content: str) -> dict:
+    """Lenient JSON (tsconfig allows comments and trailing commas)."""
+    try:
+        return json.loads(content)
+    except ValueError:
+        pass
+    try:
+        # Naive comment stripping is fine for tsconfig: path values don't contain "//"
+        return json.loads(_JSON_TRAILING_COMMAS.sub(r'\1', _JSON_COMMENTS.sub('', content)))
+    except ValueError:
+        return {}
+
+
+class ModuleIndex:
+    """
+    Import resolution over the collected file list, built once per graph build.
+
+    Every way a file can be named by an import (dotted Python modules, JS/TS
+    paths with extensions, index files and tsconfig aliases, Go package
+    directories, Java classes and packages, Rust module trees, C/C++ include
+    paths) is precomputed, so resolving an import is a few dict lookups and
+    never touches the disk.
+    """
+
+    def __init__(self, root_dir: str, files: List[str], read: Callable[[str], str]):
+        self.root_dir = root_dir
+        # Root-relative posix path -> file id (the path used by the graph)
+        self.by_rel: Dict[str, str] = {}
+        for f in files:
+            self.by_rel[os.path.relpath(f, root_dir).replace(os.sep, "/")] = f
+        # Directory -> files directly in it
+        self.dir_files: Dict[str, List[str]] = {}
+        for rel in self.by_rel:
+            self.dir_files.setdefault(posixpath.dirname(rel), []).append(rel)
+
+        self.python_modules: Dict[str, str] = {}
+        self.java_classes: Dict[str, str] = {}
+        self.java_packages: Dict[str, List[str]] = {}
+        self.go_modules: List[Tuple[str, str]] = []      # (module path, directory)
+        self.js_configs: Dict[str, dict] = {}            # directory -> {"base": .., "paths": [...]}
+        self.js_packages: Dict[str, str] = {}            # package.json name -> directory
+        self.rust_crates: List[str] = []                 # Crate source directories
+        self.c_includes: Dict[str, List[str]] = {}       # Path suffix -> C/C++ files
+
+        self._index_python()
+        self._index_java()
+        self._index_c()
+        self._index_config_files(read)
+        self._memo: Dict[Tuple[str, str, str], List[str]] = {}
+
+    # --- Index construction ---
+
+    def _index_python(self):
+        for rel in self.by_rel:
+            if not rel.endswith(".py"):
+                continue
+            parts = rel[:-3].split("/")
+            is_package = parts[-1] == "__init__"
+            if is_package:
+                parts = parts[:-1]
+            if not parts:
+                continue
+            names = [parts]
+            # src-layout style roots anywhere in the path
+            names += [parts[i + 1:] for i, p in enumerate(parts[:-1]) if p in PYTHON_SOURCE_DIRS]
+            # Regular packages: the name starts at the topmost directory with an __init__.py
+            start = len(parts) - 1
+            while start > 0 and "/".join(parts[:start]) + "/__init__.py" in self.by_rel:
+                start -= 1
+            if is_package or start < len(parts) - 1:
+                names.append(parts[start:])
+            for name in names:
+                if name:
+                    self.python_modules.setdefault(".".join(name), rel)
+
+    def _index_java(self):
+        for rel in self.by_rel:
+            if not rel.endswith((".java", ".kt")):
+                continue
+            parts = rel.rsplit(".", 1)[0].split("/")
+            # Every dotted suffix: the package root (src/main/java, ...) is unknown
+            for i in range(len(parts)):
+                self.java_classes.setdefault(".".join(parts[i:]), rel)
+                if i < len(parts) - 1:
+                    self.java_packages.setdefault(".".join(parts[i:-1]), []).append(rel)
+
+    def _index_c(self):
+        for rel in self.by_rel:
+            if not rel.endswith(C_EXTENSIONS):
+                continue
+            # Every path suffix: include directories (-I) are unknown
+            parts = rel.split("/")
+            for i in range(len(parts)):
+                self.c_includes.setdefault("/".join(parts[i:]), []).append(rel)
+
+    def _index_config_files(self, read: Callable[[str], str]):
+        for rel, f in self.by_rel.items():
+            name = posixpath.basename(rel)
+            if name not in RESOLUTION_CONFIG_FILES:
+                continue
+            directory = posixpath.dirname(rel)
+            try:
+                content = read(f)
+            except Exception as e:
+                logger.debug(f"Could not read {rel}: {e}")
+                continue
+            if not content:
+                continue
+            if name == "go.mod":
+                match = _GO_MODULE.search(content)
+                if match:
+                    self.go_modules.append((match.group(1), directory))
+            elif name == "Cargo.toml":
+                self.rust_crates.append(posixpath.join(directory, "src") if directory else "src")
+            elif name == "package.json":
+                package_name = _parse_json(content).get("name")
+                if isinstance(package_name, str) and package_name:
+                    self.js_packages.setdefault(package_name, directory)
+            elif directory not in self.js_configs or name == "tsconfig.json":
+                options = _parse_json(content).get("compilerOptions") or {}
+                base = posixpath.normpath(posixpath.join(directory, options.get("baseUrl") or "."))
+                paths = [
+                    (pattern, targets) for pattern, targets in (options.get("paths") or {}).items()
+                    if isinstance(targets, list)
+                ]
+                self.js_configs[directory] = {"base": "" if base == "." else base, "paths": paths,
+                                              "has_base_url": "baseUrl" in options}
+        # Longest module path first so nested modules win
+        self.go_modules.sort(key=lambda m: -len(m[0]))
+
+    # --- Resolution ---
+
+    def resolve(self, current_file: str, import_str: str) -> List[str]:
+        """File ids an import refers to (empty for external/unresolvable imports)."""
+        rel = os.path.relpath(current_file, self.root_dir).replace(os.sep, "/")
+        ext = posixpath.splitext(rel)[1]
+        # Memoize per scope: Rust paths depend on the file, relative imports, JS
+        # aliases (nearest tsconfig) and C includes on its directory, everything
+        # else on nothing
+        if ext == ".rs":
+            scope = rel
+        elif import_str.startswith(".") or ext in ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs') + C_EXTENSIONS:
+            scope = posixpath.dirname(rel)
+        else:
+            scope = ""
+        key = (ext, scope, import_str)
+        if key not in self._memo:
+            self._memo[key] = self._resolve(rel, ext, import_str)
+        return [self.by_rel[r] for r in self._memo[key]]
+
+    def _resolve(self, rel: str, ext: str, import_str: str) -> List[str]:
+        if ext == ".py":
+            return self._resolve_python(rel, import_str)
+        if ext in ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'):
+            return self._resolve_js(rel, import_str)
+        if ext == ".go":
+            return self._resolve_go(import_str)
+        if ext in (".java", ".kt"):
+            return self._resolve_java(import_str)
+        if ext == ".rs":
+            return self._resolve_rust(rel, import_str)
+        if ext in C_EXTENSIONS:
+            return self._resolve_c(rel, import_str)
+        return []
+
+    def _resolve_python(self, rel: str, import_str: str) -> List[str]:
+        if import_str.startswith("."):
+            level = len(import_str) - len(import_str.lstrip("."))
+            package = posixpath.dirname(rel).split("/") if posixpath.dirname(rel) else []
+            if level - 1 > len(package):
+                return []
+            base = package[:len(package) - (level - 1)]
+            rest = [p for p in import_str[level:].split(".") if p]
+            # Longest prefix that is a module (".mod.func" -> mod.py)
+            for i in range(len(rest), -1, -1):
+                target = "/".join(base + rest[:i])
+                for candidate in (target + ".py", posixpath.join(target, "__init__.py")):
+                    if candidate in self.by_rel:
+                        return [candidate]
+            return []
+
+        # Longest dotted prefix that is a module ("pkg.mod.func" -> pkg/mod.py)
+        parts = import_str.split(".")
+        for i in range(len(parts), 0, -1):
+            target = self.python_modules.get(".".join(parts[:i]))
+            if target:
+                return [target]
+        return []
+
+    def _js_file(self, path: str) -> Optional[str]:
+        """Exact file, file + extension, or directory index file."""
+        path = posixpath.normpath(path)
+        if path.startswith("../"):
+            return None
+        if path in self.by_rel:
+            return path
+        stem, ext = posixpath.splitext(path)
+        candidates = [path + e for e in JS_EXTENSIONS]
+        if ext in ('.js', '.jsx', '.mjs', '.cjs'):
+            # ESM TypeScript imports "./x.js" for "./x.ts"
+            candidates += [stem + e for e in JS_EXTENSIONS]
+        candidates += [posixpath.join(path, "index" + e) for e in JS_EXTENSIONS]
+        for candidate in candidates:
+            if candidate in self.by_rel:
+                return candidate
+        return None
+
+    def _js_config(self, rel: str) -> Optional[dict]:
+        directory = posixpath.dirname(rel)
+        while True:
+            config = self.js_configs.get(directory)
+            if config is not None:
+                return config
+            if not directory:
+                return None
+            directory = posixpath.dirname(directory)
+
+    def _resolve_js(self, rel: str, import_str: str) -> List[str]:
+        if import_str.startswith("."):
+            target = self._js_file(posixpath.join(posixpath.dirname(rel), import_str))
+            return [target] if target else []
+
+        config = self._js_config(rel)
+        if config:
+            for pattern, targets in config["paths"]:
+                prefix, star, suffix = pattern.partition("*")
+                if star:
+                    if not (import_str.startswith(prefix) and import_str.endswith(suffix)):
+                        continue
+                    matched = import_str[len(prefix):len(import_str) - len(suffix)]
+                elif import_str != pattern:
+                    continue
+                else:
+                    matched = ""
+                for t in targets:
+                    target = self._js_file(posixpath.join(config["base"], t.replace("*", matched)))
+                    if target:
+                        return [target]
+            if config["has_base_url"]:
+                target = self._js_file(posixpath.join(config["base"], import_str))
+                if target:
+                    return [target]
+
+        # Workspace packages ("@org/pkg/sub" -> packages/pkg/sub)
+        parts = import_str.split("/")
+        name_len = 2 if import_str.startswith("@") else 1
+        directory = self.js_packages.get("/".join(parts[:name_len]))
+        if directory is not None:
+            sub = "/".join(parts[name_len:])
+            for candidate in ([sub] if sub else []) + ["src/index", "index"] + ([f"src/{sub}"] if sub else []):
+                target = self._js_file(posixpath.join(directory, candidate))
+                if target:
+                    return [target]
+        return []
+
+    def _resolve_go(self, import_str: str) -> List[str]:
+        for module, directory in self.go_modules:
+            if import_str == module or import_str.startswith(module + "/"):
+                package_dir = posixpath.join(directory, import_str[len(module):].lstrip("/")).rstrip("/")
+                package_dir = posixpath.normpath(package_dir) if package_dir else ""
+                return [
+                    r for r in self.dir_files.get("" if package_dir == "." else package_dir, [])
+                    if r.endswith(".go") and not r.endswith("_test.go")
+                ]
+        return []
+
+    def _resolve_java(self, import_str: str) -> List[str]:
+        name = import_str[len("static "):] if import_str.startswith("static ") else import_str
+        if name.endswith(".*"):
+            return list(self.java_packages.get(name[:-2], []))
+        # "com.x.Outer.Inner" or static members: longest prefix that is a class
+        parts = name.split(".")
+        for i in range(len(parts), 1, -1):
+            target = self.java_classes.get(".".join(parts[:i]))
+            if target:
+                return [target]
+        return []
+
+    def _rust_module_dir(self, rel: str) -> str:
+        """Directory holding a Rust file's child modules."""
+        directory, name = posixpath.split(rel)
+        if name in ("mod.rs", "lib.rs", "main.rs"):
+            return directory
+        return posixpath.join(directory, name[:-3])
+
+    def _rust_crate_root(self, rel: str) -> str:
+        for crate in sorted(self.rust_crates, key=len, reverse=True):
+            if rel.startswith(crate + "/"):
+                return crate
+        return posixpath.dirname(rel)
+
+    def _rust_module(self, directory: str, parts: List[str]) -> Optional[str]:
+        """Longest prefix of `parts` that is a module file under `directory`."""
+        for i in range(len(parts), 0, -1):
+            path = posixpath.join(directory, *parts[:i]) if directory else "/".join(parts[:i])
+            for candidate in (path + ".rs", posixpath.join(path, "mod.rs")):
+                if candidate in self.by_rel:
+                    return candidate
+        return None
+
+    def _resolve_rust(self, rel: str, import_str: str) -> List[str]:
+        parts = [p for p in import_str.split("::") if p]
+        if not parts:
+            return []
+        if len(parts) == 1 and parts[0] not in ("crate", "self", "super"):
+            # `mod foo;` (or a single-segment `use`)
+            target = self._rust_module(self._rust_module_dir(rel), parts)
+            return [target] if target else []
+
+        head, rest = parts[0], parts[1:]
+        if head == "crate":
+            directory = self._rust_crate_root(rel)
+        elif head == "self":
+            directory = self._rust_module_dir(rel)
+        elif head == "super":
+            directory = posixpath.dirname(self._rust_module_dir(rel))
+            while rest and rest[0] == "super":
+                directory, rest = posixpath.dirname(directory), rest[1:]
+        else:
+            # External crate, or a sibling module used by name
+            directory, rest = self._rust_module_dir(rel), parts
+        target = self._rust_module(directory, rest) if rest else None
+        return [target] if target else []
+
+    def _resolve_c(self, rel: str, import_str: str) -> List[str]:
+        # Quoted includes search the including file's directory first
+        local = posixpath.normpath(posixpath.join(posixpath.dirname(rel), import_str))
+        if local in self.by_rel:
+            return [local]
+        candidates = self.c_includes.get(posixpath.normpath(import_str).lstrip("./"))
+        if not candidates:
+            return []
+        # Ambiguous suffix: the candidate sharing the most leading directories
+        parts = rel.split("/")
+
+        def shared(candidate: str) -> int:
+            n = 0
+            for a, b in zip(parts, candidate.split("/")):
+                if a != b:
+                    break
+                n += 1
+            return n
+
+        return [max(candidates, key=shared)]
+
+    @staticmethod
+    def affects_resolution(rel_path: str) -> bool:
+        """True for files (tsconfig, go.mod, ...) whose changes can re-point any import."""
+        return posixpath.basename(rel_path) in RESOLUTION_CONFIG_FILES
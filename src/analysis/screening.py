@@ -0,0 +1,70 @@
+import math
+import logging
+from collections import Counter
+from typing import Optional
+
+from src.core.constants import GENERATED_SUFFIXES, GENERATED_MARKERS
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the rules below change (invalidates cached verdicts)
+SCREEN_VERSION = "1"
+
+# Files above this size are never read, only listed
+MAX_ANALYSIS_BYTES = 1024 * 1024
+# Bytes sampled from the head of a file for the content checks
+SAMPLE_BYTES = 32 * 1024
+# Minified: long average line or a single enormous line
+MINIFIED_AVG_LINE = 300
+MINIFIED_MAX_LINE = 5000
+# Bits per byte: source code is typically 4.5-5.2, base64 is ~6, compressed data ~8
+DATA_ENTROPY = 5.6
+# Lines searched for generated-code markers
+MARKER_LINES = 10
+# Prose legitimately has long unwrapped lines
+PROSE_EXTENSIONS = {'.md', '.markdown', '.rst', '.txt', '.adoc'}
+
+
+def screen_name(rel_path: str, size: int, is_generated: bool = False) -> Optional[str]:
+    """Reason to skip a file based on metadata alone, or None."""
+    if is_generated:
+        return "generated"
+    if size > MAX_ANALYSIS_BYTES:
+        return "large"
+    name = rel_path.rsplit("/", 1)[-1].lower()
+    if any(name.endswith(suffix) for suffix in GENERATED_SUFFIXES):
+        return "generated"
+    return None
+
+
+def format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{max(size // 1024, 1)} KB"
+
+
+def _entropy(sample: bytes) -> float:
+    total = len(sample)
+    return -sum((n / total) * math.log2(n / total) for n in Counter(sample).values())
+
+
+def screen_content(rel_path: str, sample: bytes) -> Optional[str]:
+    """Reason to skip a file based on a sample of its head, or None."""
+    if not sample:
+        return None
+    name = rel_path.rsplit("/", 1)[-1].lower()
+    is_prose = any(name.endswith(ext) for ext in PROSE_EXTENSIONS)
+
+    head = sample[:4096].decode("utf-8", errors="ignore").lower()
+    for line in head.splitlines()[:MARKER_LINES]:
+        if any(marker in line for marker in GENERATED_MARKERS):
+            return "generated"
+
+    lines = sample.split(b"\n")
+    longest = max(len(line) for line in lines)
+    if not is_prose and (longest > MINIFIED_MAX_LINE or (len(lines) > 1 and len(sample) / len(lines) > MINIFIED_AVG_LINE)):
+        return "minified"
+
+    if len(sample) >= 1024 and _entropy(sample) > DATA_ENTROPY:
+        return "data"
+    return None
@@ -0,0 +1,161 @@
+import os
+import mmap
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+from src.utils import git_blob_id
+
+logger = logging.getLogger(__name__)
+
+# Files at least this large are memory-mapped instead of read onto the heap
+# (well under screening's MAX_ANALYSIS_BYTES, above which files are never read)
+MMAP_THRESHOLD = 256 * 1024
+
+
+class FileSnapshot:
+    """
+    One file's bytes, read once per run. Text is decoded lazily and the
+    git blob id is computed lazily, so stages only pay for what they use.
+    """
+
+    __slots__ = ("path", "data", "_text", "_blob_id")
+
+    def __init__(self, path: str, data: Union[bytes, mmap.mmap]):
+        self.path = path
+        self.data = data
+        self._text: Optional[str] = None
+        self._blob_id: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def is_mapped(self) -> bool:
+        return isinstance(self.data, mmap.mmap)
+
+    @property
+    def text(self) -> str:
+        """UTF-8 text with universal newlines (undecodable bytes dropped)."""
+        if self._text is None:
+            self._text = self.decode(0, len(self.data)).replace("\r\n", "\n")
+        return self._text
+
+    @property
+    def blob_id(self) -> str:
+        if self._blob_id is None:
+            self._blob_id = git_blob_id(self.data)
+        return self._blob_id
+
+    def decode(self, start: int, end: int) -> str:
+        """Decodes a byte range (e.g. a tree-sitter node) without decoding the whole file."""
+        return bytes(self.data[start:end]).decode("utf-8", errors="ignore")
+
+    def as_bytes(self) -> bytes:
+        return self.data if isinstance(self.data, bytes) else self.data[:]
+
+    def head(self, max_lines: int, max_bytes: Optional[int] = None) -> str:
+        """
+        First `max_lines` lines, decoding only as much as needed. `max_bytes`
+        caps the read so a minified file's single line can't be megabytes.
+        """
+        limit = len(self.data) if max_bytes is None else min(len(self.data), max_bytes)
+        end = 0
+        for _ in range(max_lines):
+            nl = self.data.find(b"\n", end, limit)
+            if nl == -1:
+                end = limit
+                break
+            end = nl + 1
+        return self.decode(0, end).replace("\r\n", "\n")
+
+    def close(self):
+        if self.is_mapped:
+            try:
+                self.data.close()
+            except Exception:
+                pass
+
+
+def read_snapshot(path: str) -> Optional[FileSnapshot]:
+    """Reads a file into a snapshot without a store. None if unreadable."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+    except Exception as e:
+        logger.debug(f"Could not read {path}: {e}")
+        return None
+    return FileSnapshot(path, data)
+
+
+class SnapshotStore:
+    """
+    Per-run store that reads each file once (as bytes, mmap for large ones) and
+    shares it between the dependency graph, the parser and the builder.
+
+    Heap-resident snapshots are kept least-recently-used up to `max_bytes`;
+    evicted files are simply read again if a later stage needs them.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._snapshots: "OrderedDict[str, FileSnapshot]" = OrderedDict()
+        self._heap_bytes = 0
+        self._lock = threading.Lock()
+        self.reads = 0
+
+    def get(self, path: str) -> Optional[FileSnapshot]:
+        """Returns the file's snapshot, reading it on first use. None if unreadable."""
+        with self._lock:
+            snapshot = self._snapshots.get(path)
+            if snapshot is not None:
+                self._snapshots.move_to_end(path)
+                return snapshot
+
+        snapshot = read_snapshot(path)
+        if snapshot is None:
+            return None
+
+        with self._lock:
+            existing = self._snapshots.get(path)
+            if existing is not None:
+                # Another thread read it meanwhile; keep theirs
+                snapshot.close()
+                return existing
+            self.reads += 1
+            self._snapshots[path] = snapshot
+            if not snapshot.is_mapped:
+                self._heap_bytes += snapshot.size
+            self._evict()
+        return snapshot
+
+    def text(self, path: str) -> str:
+        """Decoded file text, or "" if the file can't be read."""
+        snapshot = self.get(path)
+        return snapshot.text if snapshot else ""
+
+    # Dropped snapshots aren't closed: another thread may still hold them,
+    # and mappings are unmapped once the last reference goes away.
+    def _evict(self):
+        while self._heap_bytes > self.max_bytes and len(self._snapshots) > 1:
+            _, old = self._snapshots.popitem(last=False)
+            if not old.is_mapped:
+                self._heap_bytes -= old.size
+
+    def release(self, path: str):
+        """Drops a snapshot that no later stage needs."""
+        with self._lock:
+            snapshot = self._snapshots.pop(path, None)
+            if snapshot is not None and not snapshot.is_mapped:
+                self._heap_bytes -= snapshot.size
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self._heap_bytes = 0
@@ -0,0 +1,75 @@
+import logging
+from typing import List, Dict, Tuple
+
+from src.analysis.parser import FileAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Share of a file's symbol value spread evenly over its definitions, so
+# unreferenced definitions still count for something
+UNIFORM_SHARE = 0.5
+
+
+class SymbolIndex:
+    """
+    Ranks individual definitions by who references them.
+
+    Every definition name is looked up in the identifiers other files use. A
+    referencing file passes its own rank to each file defining that name,
+    split evenly when several files define it (so common names like `get` or
+    `run` count for little). A file never scores its own definitions.
+    """
+
+    def __init__(self, analyses: Dict[str, FileAnalysis], ranks: Dict[str, float]):
+        definers: Dict[str, List[str]] = {}
+        for path, analysis in analyses.items():
+            for name in dict.fromkeys(d.name for d in analysis.skeleton.definitions):
+                definers.setdefault(name, []).append(path)
+
+        # (defining file, name) -> rank mass of the files referencing it
+        referenced: Dict[Tuple[str, str], float] = {}
+        for path, analysis in analyses.items():
+            rank = ranks.get(path, 0.0)
+            for name in analysis.references:
+                targets = definers.get(name)
+                if not targets:
+                    continue
+                targets = [t for t in targets if t != path]
+                for target in targets:
+                    key = (target, name)
+                    referenced[key] = referenced.get(key, 0.0) + rank / len(targets)
+
+        self.scores: Dict[str, List[float]] = {
+            path: [referenced.get((path, d.name), 0.0) for d in analysis.skeleton.definitions]
+            for path, analysis in analyses.items()
+        }
+        logger.debug(f"Symbol index: {len(definers)} names, {len(referenced)} referenced definitions.")
+
+    def file_scores(self, path: str) -> List[float]:
+        """Score per definition of a file, aligned with its skeleton (empty if unknown)."""
+        return self.scores.get(path, [])
+
+    def promote(self, path: str, indices: List[int]):
+        """Moves the given definitions of a file ahead of all its others (e.g. focus matches)."""
+        scores = self.scores.get(path)
+        if not scores or not indices:
+            return
+        lead = max(scores) + 1e-9
+        for i in indices:
+            scores[i] += lead
+
+
+def top_symbols(scores: List[float], k: int) -> Tuple[List[int], float]:
+    """
+    Indices of a file's `k` best definitions (in file order) and the share of
+    the file's symbol value they carry: half by count, half by reference score.
+    """
+    n = len(scores)
+    if n == 0:
+        return [], 0.0
+    k = min(k, n)
+    # Stable: ties keep file order, so unreferenced files show their first definitions
+    chosen = sorted(sorted(range(n), key=lambda i: -scores[i])[:k])
+    total = sum(scores)
+    referenced = sum(scores[i] for i in chosen) / total if total > 0 else k / n
+    return chosen, UNIFORM_SHARE * k / n + (1 - UNIFORM_SHARE) * referenced
@@ -0,0 +1,58 @@
+import posixpath
+from dataclasses import dataclass, field
+from typing import List, Dict
+
+from src.analysis.packer import REPRESENTATION_WEIGHTS
+
+
+@dataclass(frozen=True)
+class ContextView:
+    """
+    A smaller map packed from the same candidates as the full one: its own
+    share of the token budget and its own value per representation kind.
+    """
+    name: str
+    budget_share: float
+    weights: Dict[str, float] = field(default_factory=lambda: dict(REPRESENTATION_WEIGHTS))
+    dependencies: bool = False  # Prepend the import edges between the files shown
+
+
+# Named views next to the full map ("full"), cheapest last
+CONTEXT_VIEWS: Dict[str, ContextView] = {
+    # Broad but shallow: skeletons over full text, so more files fit
+    "overview": ContextView("overview", 0.4, {
+        "path": 0.05, "names": 0.4, "symbols": 1.0, "skeleton": 1.0, "full": 1.05,
+    }),
+    # What the README claims must match: file names, commands and versions in
+    # config files (boosted, kept full), public names; many paths, little code
+    "claims": ContextView("claims", 0.25, {
+        "path": 0.1, "names": 0.5, "symbols": 0.6, "skeleton": 0.7, "full": 0.8,
+    }),
+    # Layout and dependencies for diagrams: outlines and paths only
+    "structure": ContextView("structure", 0.1, {
+        "path": 0.1, "names": 0.4, "symbols": 0.3, "skeleton": 0.3, "full": 0.0,
+    }, dependencies=True),
+}
+
+DEPENDENCIES_HEADER = "--- DEPENDENCIES (internal imports) ---\n"
+
+
+def dependency_lines(files: List[str], edges: Dict[str, List[str]], rel_paths: Dict[str, str]) -> List[str]:
+    """
+    One "- a -> b, c" line per file (in the given order) importing other files
+    of the list. Targets in the same directory are shown by base name.
+    """
+    shown = set(files)
+    lines = []
+    for f in files:
+        targets = [t for t in edges.get(f, ()) if t in shown and t != f]
+        if not targets:
+            continue
+        source = rel_paths[f]
+        folder = posixpath.dirname(source)
+        names = [
+            posixpath.basename(rel_paths[t]) if posixpath.dirname(rel_paths[t]) == folder else rel_paths[t]
+            for t in targets
+        ]
+        lines.append(f"- {source} -> {', '.join(names)}\n")
+    return lines
@@ -31,6 +31,45 @@ class Settings(BaseSettings):
     MODEL_PLANNER: str = "gpt-4o"
     MODEL_WRITER: str = "gpt-4o"
     
+    # Analysis Cache (skeletons and graph.sqlite, keyed by git blob id + parser version)
+    ANALYSIS_CACHE_DIR: str = ".repo_cache/.analysis"
+    SKELETON_CACHE_MAX_MB: int = 256
+    
+    # Skeleton extraction: "thread", "process" (multi-core), or "auto" (by repo size)
+    ANALYSIS_EXECUTOR: Literal["auto", "thread", "process"] = "auto"
+    ANALYSIS_WORKERS: int = 0  # Process-pool size; 0 = CPU count
+
+    # Dependency-graph PageRank: stops once the L1 change < files * tolerance
+    PAGERANK_TOLERANCE: float = 1e-6
+    PAGERANK_MAX_ITER: int = 100
+
+    # Rank definitions by cross-file references and offer top-k symbol views per file
+    SYMBOL_RANKING: bool = True
+
+    # Monorepos (nested package.json/pyproject.toml/go.mod/Cargo.toml roots) are
+    # ranked per package and the budget is split between packages (parsing and
+    # packing still cover the whole repo). A nested root counts if a workspace
+    # declares it or it holds MONOREPO_MIN_PACKAGE_FILES files
+    MONOREPO_SHARDING: bool = True
+    MONOREPO_MIN_PACKAGES: int = 2
+    MONOREPO_MIN_PACKAGE_FILES: int = 20
+
+    # Also pack smaller named views of the map (overview, claims, structure)
+    # for agents that don't need the full context
+    CONTEXT_VIEWS: bool = True
+
+    # LLM response cache: identical requests (provider, model, settings and
+    # messages) are replayed from disk. Nodes listed in LLM_CACHE_SKIP_NODES
+    # (comma-separated, e.g. "writer,reviewer") always call the model.
+    LLM_CACHE: bool = True
+    LLM_CACHE_DIR: str = ".repo_cache/.llm"
+    LLM_CACHE_MAX_MB: int = 128
+    LLM_CACHE_MAX_AGE_HOURS: float = 168  # 0 = never expire
+    LLM_CACHE_SKIP_NODES: str = ""
+
+    # Agents whose output is streamed token by token to the CLI/UI (comma-separated)
+    STREAM_NODES: str = "writer"
+    
     model_config = SettingsConfigDict(
         env_file=".env", 
         env_file_encoding="utf-8",
@@ -17,3 +17,15 @@ IGNORE_FILES: Set[str] = {
     'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock', 
     'Cargo.lock', 'gemfile.lock', 'composer.lock', 'mix.lock'
 }
+
+# Name patterns of generated/minified files (summarized by path, never parsed)
+GENERATED_SUFFIXES: Set[str] = {
+    '.min.js', '.min.css', '.js.map', '.css.map', '.bundle.js',
+    '_pb2.py', '_pb2_grpc.py', '.pb.go', '.pb.cc', '.pb.h',
+    '.g.dart', '.freezed.dart', '.designer.cs', '.generated.ts'
+}
+
+# Header markers of generated code (checked in the first lines only)
+GENERATED_MARKERS: Set[str] = {
+    '@generated', 'do not edit', 'code generated by', 'auto-generated', 'autogenerated'
+}
@@ -1,4 +1,4 @@
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from src.core.state import DocumentationState
 from src.agents.nodes import (
     node_architect, node_writer, node_visualizer, node_reviewer, node_intelligence
@@ -29,10 +29,17 @@ def create_graph():
     workflow.add_node("reviewer", node_reviewer)
     
     # 2. Add Edges
-    workflow.set_entry_point("intelligence")
+    # Intelligence and Visualizer only read the repo context, so they run in
+    # the same superstep; the Architect needs the insights and follows
+    # Intelligence. LangGraph finishes a whole step before starting the next,
+    # so the Architect also waits for the Visualizer: this saves the shorter
+    # of the two calls, not the Visualizer's whole run.
+    # Nodes running in the same step must write disjoint state keys.
+    workflow.add_edge(START, "intelligence")
+    workflow.add_edge(START, "visualizer")
     workflow.add_edge("intelligence", "architect")
-    workflow.add_edge("architect", "visualizer")
-    workflow.add_edge("visualizer", "writer")
+    # Join: the Writer waits for both the plan and the visual assets
+    workflow.add_edge(["architect", "visualizer"], "writer")
     workflow.add_edge("writer", "reviewer")
     
     workflow.add_conditional_edges(
@@ -0,0 +1,80 @@
+"""
+Disk-backed cache of LLM responses, plugged into LangChain's model cache hook.
+"""
+import json
+import time
+import logging
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from src.utils import DiskCache, hash_key
+
+logger = logging.getLogger(__name__)
+
+# Bump to drop every cached response (e.g. when the stored format changes)
+CACHE_VERSION = "1"
+# Set in response_metadata of messages served from the cache
+CACHE_HIT_FLAG = "llm_cache_hit"
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Replays earlier responses for identical requests.
+
+    LangChain calls `lookup`/`update` with the serialized message list and an
+    "llm string" describing the model (class, model name, temperature and
+    every other call parameter). Both are hashed, together with the provider,
+    into a DiskCache key, so a request is only replayed for the same model,
+    settings and messages. Entries expire after `max_age` seconds and the
+    least recently used go first once the cache outgrows `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, provider: str, max_bytes: int, max_age: Optional[float] = None):
+        self.provider = provider
+        self.store = DiskCache(cache_dir, max_bytes=max_bytes, max_age=max_age)
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return hash_key(CACHE_VERSION, self.provider, llm_string, prompt)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        data = self.store.get(self._key(prompt, llm_string))
+        if data is None:
+            return None
+        try:
+            entry = json.loads(data)
+            messages = messages_from_dict(entry["messages"])
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable LLM cache entry: {e}")
+            return None
+        for message in messages:
+            message.response_metadata[CACHE_HIT_FLAG] = True
+        return [ChatGeneration(message=message) for message in messages]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        messages = [g.message for g in return_val if isinstance(g, ChatGeneration)]
+        if not messages or len(messages) != len(return_val):
+            return
+        entry = {"created": time.time(), "messages": [message_to_dict(m) for m in messages]}
+        self.store.set(self._key(prompt, llm_string), json.dumps(entry))
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    def prune(self) -> int:
+        return self.store.prune()
+
+    @property
+    def hits(self) -> int:
+        return self.store.hits
+
+    @property
+    def misses(self) -> int:
+        return self.store.misses
+
+
+def is_cache_hit(response: Any) -> bool:
+    """Whether a model response was served from the LLM response cache."""
+    return bool((getattr(response, "response_metadata", None) or {}).get(CACHE_HIT_FLAG))
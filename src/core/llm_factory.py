@@ -2,6 +2,7 @@
 Optimized LLM factory with connection pooling and caching.
 """
 import os
+import threading
 from typing import Optional, Dict
 from functools import lru_cache
 from langchain_core.language_models import BaseChatModel
@@ -10,6 +11,7 @@ from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 from src.core.config import config
+from src.core.llm_cache import LLMResponseCache
 
 
 class LLMFactory:
@@ -18,28 +20,34 @@ class LLMFactory:
     Reduces overhead by caching model instances.
     """
     
-    # Cache for model instances (key: f"{provider}_{model_name}_{temperature}")
+    # Cache for model instances (key: f"{provider}_{model_name}_{temperature}_{cached}")
     _model_cache: Dict[str, BaseChatModel] = {}
+    # On-disk response caches, one per provider (parallel nodes may ask at once)
+    _response_caches: Dict[str, LLMResponseCache] = {}
+    _response_cache_lock = threading.Lock()
     
     @classmethod
-    def _get_cache_key(cls, provider: str, model_name: str, temperature: float) -> str:
+    def _get_cache_key(cls, provider: str, model_name: str, temperature: float, cached: bool = False) -> str:
         """Generate cache key for model instance."""
-        return f"{provider}_{model_name}_{temperature}"
+        return f"{provider}_{model_name}_{temperature}_{cached}"
     
     @classmethod
-    def get_model(cls, model_name: str, temperature: float = 0.0) -> BaseChatModel:
+    def get_model(cls, model_name: str, temperature: float = 0.0, cache_responses: bool = True) -> BaseChatModel:
         """
         Get or create a cached LLM instance.
         
         Args:
             model_name: Name of the model
             temperature: Sampling temperature
+            cache_responses: Replay responses to identical requests from disk
+                (only when LLM_CACHE is enabled)
         
         Returns:
             Cached or new LLM instance
         """
         provider = config.ACTIVE_PROVIDER
-        cache_key = cls._get_cache_key(provider, model_name, temperature)
+        cached = cache_responses and config.LLM_CACHE
+        cache_key = cls._get_cache_key(provider, model_name, temperature, cached)
         
         # Check cache first
         if cache_key in cls._model_cache:
@@ -47,6 +55,8 @@ class LLMFactory:
         
         # Create new instance
         model = cls._create_model(provider, model_name, temperature)
+        if cached:
+            model.cache = cls.get_response_cache(provider)
         
         # Cache it
         cls._model_cache[cache_key] = model
@@ -152,6 +162,31 @@ class LLMFactory:
         # Fallback to environment
         return os.getenv(env_var)
     
+    @classmethod
+    def get_response_cache(cls, provider: str) -> LLMResponseCache:
+        """The on-disk response cache of a provider (created on first use)."""
+        with cls._response_cache_lock:
+            if provider not in cls._response_caches:
+                cls._response_caches[provider] = LLMResponseCache(
+                    os.path.join(config.LLM_CACHE_DIR, provider),
+                    provider,
+                    max_bytes=config.LLM_CACHE_MAX_MB * 1024 * 1024,
+                    max_age=config.LLM_CACHE_MAX_AGE_HOURS * 3600 if config.LLM_CACHE_MAX_AGE_HOURS > 0 else None
+                )
+            return cls._response_caches[provider]
+    
+    @classmethod
+    def response_cache_stats(cls) -> Dict[str, int]:
+        """Response cache hits and misses across providers since start-up."""
+        caches = cls._response_caches.values()
+        return {"hits": sum(c.hits for c in caches), "misses": sum(c.misses for c in caches)}
+    
+    @classmethod
+    def prune_response_caches(cls):
+        """Applies the size and age limits of every response cache."""
+        for cache in cls._response_caches.values():
+            cache.prune()
+    
     @classmethod
     def clear_cache(cls):
         """Clear the model cache. Useful for testing or configuration changes."""
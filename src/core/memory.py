@@ -6,6 +6,10 @@ from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Run bookkeeping written by the workflow. Not preferences, and it changes on
+# every run, which would make every prompt (and LLM cache key) unique.
+BOOKKEEPING_KEYS = {"last_repo", "generation_count", "last_activity"}
+
 class UserMemory:
     """
     Manages persistent user memory and preferences for the LLM agents.
@@ -51,7 +55,7 @@ class UserMemory:
         Returns a formatted string of the user's memory context 
         for injection into LLM prompts.
         """
-        data = self._load_memory()
+        data = {k: v for k, v in self._load_memory().items() if k not in BOOKKEEPING_KEYS}
         if not data:
             return "No previous user preferences found."
         
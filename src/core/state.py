@@ -1,4 +1,17 @@
-from typing import TypedDict, List, Dict, Any, Optional, Union
+from typing import TypedDict, List, Dict, Any, Optional, Union, Annotated
+
+
+def merge_token_usage(left: Optional[Dict[str, Dict[str, int]]], right: Optional[Dict[str, Dict[str, int]]]) -> Dict[str, Dict[str, int]]:
+    """
+    Reducer for per-node token counts: sums the counters of each node, so
+    parallel nodes and repeated runs (the review loop) all add up.
+    """
+    merged = {node: dict(counts) for node, counts in (left or {}).items()}
+    for node, counts in (right or {}).items():
+        totals = merged.setdefault(node, {})
+        for name, value in counts.items():
+            totals[name] = totals.get(name, 0) + (value or 0)
+    return merged
 
 class DocumentationState(TypedDict):
     """
@@ -9,6 +22,7 @@ class DocumentationState(TypedDict):
     repo_owner: str
     repo_name: str
     repo_data: Union[str, Dict[str, Any]]  # Raw data/file tree from GitHub GraphQL or context string
+    repo_views: Dict[str, str]      # Smaller context views by name ("overview", "claims", "structure")
     local_path: str                 # Path to the cloned repository
     user_instructions: Optional[str] # Custom user instructions/focus areas
     
@@ -31,3 +45,6 @@ class DocumentationState(TypedDict):
     # Quality Control
     review_feedback: Optional[str]            # Feedback from the Reviewer agent
     iteration: int                  # Loop counter to prevent infinite refinement
+    
+    # Telemetry
+    token_usage: Annotated[Dict[str, Dict[str, int]], merge_token_usage]  # Per node: calls, input, cache_read, cache_creation, output
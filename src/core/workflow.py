@@ -5,32 +5,46 @@ from datetime import datetime
 
 from src.core.config import config
 from src.core.graph import create_graph
+from src.core.llm_factory import LLMFactory
 from src.core.memory import memory
+from src.core.state import merge_token_usage
 from src.ingestion.repo_manager import RepoManager
 from src.analysis.builder import ContextBuilder
 from src.analysis.model_caps import ModelCapabilities
-from src.utils import count_tokens
 
 logger = logging.getLogger(__name__)
 
 class GenerationEvent:
     """Standardized event for workflow updates."""
     def __init__(self, type: str, message: str, progress: int = 0, payload: Any = None):
-        self.type = type # 'status', 'log', 'result', 'error'
-        self.message = message
+        self.type = type # 'status', 'log', 'token', 'result', 'error'
+        self.message = message # For 'token': the new text only
         self.progress = progress
         self.payload = payload
 
+def _chunk_text(chunk: Any) -> str:
+    """Text of a streamed message chunk (string content or a list of content blocks)."""
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content
+        if not isinstance(block, dict) or block.get("type") == "text"
+    )
+
 class ReadmeWorkflow:
     """
     Encapsulates the end-to-end logic for generating a README.
     Shared by both CLI and Web UI to ensure consistency.
     """
 
+    # Intelligence and Visualizer run concurrently and may finish in either
+    # order; progress only ever moves forward (see run)
     NODE_META = {
-        "intelligence": {"msg": "🕵️ **Intelligence**: \"Auditing code quality...\"", "prog": 20},
-        "architect": {"msg": "🏗️ **Architect**: \"Designing the blueprint...\"", "prog": 40},
-        "visualizer": {"msg": "🎨 **Visualizer**: \"Sketching diagrams...\"", "prog": 60},
+        "intelligence": {"msg": "🕵️ **Intelligence**: \"Auditing code quality...\"", "prog": 30},
+        "visualizer": {"msg": "🎨 **Visualizer**: \"Sketching diagrams...\"", "prog": 35},
+        "architect": {"msg": "🏗️ **Architect**: \"Designing the blueprint...\"", "prog": 60},
         "writer": {"msg": "✍️ **Writer**: \"Drafting the content...\"", "prog": 80},
         "reviewer": {"msg": "🔍 **Reviewer**: \"Reviewing for accuracy...\"", "prog": 95}
     }
@@ -67,10 +81,16 @@ class ReadmeWorkflow:
 
             yield GenerationEvent("status", f"🧠 Architect: Analyzing structure (Budget: {token_budget:,} tokens)...", 15)
             builder = ContextBuilder(local_path)
-            repo_text = builder.build_repository_map(max_tokens=token_budget)
-            token_count = count_tokens(repo_text)
+            # The focus also steers which files make it into the map (and shrinks it when narrow)
+            repo_map = builder.build_repository_map(max_tokens=token_budget, focus=custom_focus)
+            repo_text = repo_map.render()
+            repo_views = {name: view.render() for name, view in repo_map.views.items()}
             
-            yield GenerationEvent("log", f"Context built: {token_count:,} tokens")
+            yield GenerationEvent("log", f"Context built: {repo_map.total_tokens:,} tokens across {len(repo_map.files):,} files")
+            if repo_map.views:
+                yield GenerationEvent("log", "Context views: " + ", ".join(
+                    f"{name} {view.total_tokens:,} tokens" for name, view in repo_map.views.items()
+                ))
 
             # 4. Graph Execution
             app = create_graph()
@@ -79,6 +99,7 @@ class ReadmeWorkflow:
                 "repo_owner": owner, 
                 "repo_name": repo, 
                 "repo_data": repo_text,
+                "repo_views": repo_views,
                 "local_path": local_path,
                 
                 # User controls
@@ -99,18 +120,58 @@ class ReadmeWorkflow:
                 "vulnerabilities": [],
                 "review_feedback": None,
                 "iteration": 0, 
+                
+                # Telemetry
+                "token_usage": {},
             }
             
             final_state = initial_state
+            cache_before = LLMFactory.response_cache_stats()
+            token_usage = {}
+            progress = 15
+            stream_nodes = {n.strip() for n in config.STREAM_NODES.split(",") if n.strip()}
+            # Graph step each streaming node is writing in (a new step restarts its text)
+            stream_steps: Dict[str, int] = {}
             
-            for event in app.stream(initial_state):
-                for key, value in event.items():
+            # "messages" carries the LLM tokens of nodes as they are generated
+            # "updates" holds the updates of one finished node; parallel nodes
+            # write disjoint keys, so merging them in arrival order is safe
+            for mode, data in app.stream(initial_state, stream_mode=["messages", "updates"]):
+                if mode == "messages":
+                    chunk, metadata = data
+                    node = metadata.get("langgraph_node")
+                    text = _chunk_text(chunk)
+                    if node in stream_nodes and text:
+                        step = metadata.get("langgraph_step")
+                        restart = stream_steps.get(node) != step
+                        stream_steps[node] = step
+                        yield GenerationEvent("token", text, progress, {"node": node, "restart": restart})
+                    continue
+                for key, value in data.items():
                     if key in self.NODE_META:
                         meta = self.NODE_META[key]
-                        yield GenerationEvent("status", meta["msg"], meta["prog"])
+                        progress = max(progress, meta["prog"])
+                        yield GenerationEvent("status", meta["msg"], progress)
                     
                     if value:
                         final_state.update(value)
+                        # Mirror the graph's reducer: token counts add up per node
+                        if value.get("token_usage"):
+                            token_usage = merge_token_usage(token_usage, value["token_usage"])
+
+            if token_usage:
+                yield GenerationEvent("log", "Prompt cache: " + ", ".join(
+                    f"{node} {counts.get('cache_read', 0):,}/{counts.get('input', 0):,} cached"
+                    for node, counts in token_usage.items()
+                ))
+
+            if config.LLM_CACHE:
+                cache_after = LLMFactory.response_cache_stats()
+                hits = cache_after["hits"] - cache_before["hits"]
+                misses = cache_after["misses"] - cache_before["misses"]
+                if hits or misses:
+                    yield GenerationEvent("log", f"LLM response cache: {hits} hits, {misses} misses")
+                LLMFactory.prune_response_caches()
 
             # 5. Final Assembly
             draft = final_state.get('draft_sections', {}).get('full_readme', '')
@@ -137,7 +198,8 @@ class ReadmeWorkflow:
                 "markdown": final_md,
                 "owner": owner,
                 "repo": repo,
-                "duration": duration
+                "duration": duration,
+                "token_usage": token_usage
             }
             yield GenerationEvent("result", "Generation Complete", 100, result_payload)
 
@@ -1,4 +1,5 @@
 import argparse
+import os
 import sys
 import logging
 from src.core.config import config
@@ -24,6 +25,9 @@ def main():
     repo_url = f"https://github.com/{args.owner}/{args.repo}.git"
     workflow = ReadmeWorkflow()
     final_result = None
+    # The draft streams into a sibling file; the output is only replaced on success
+    draft_path = f"{args.output}.draft"
+    draft_file = None
 
     print(f"\n🚀 Starting generation for {args.owner}/{args.repo}...\n")
 
@@ -32,6 +36,15 @@ def main():
         for event in workflow.run(repo_url, custom_focus=args.focus):
             if event.type == "status":
                 print(f"[{event.progress}%] {event.message}")
+            elif event.type == "token":
+                if draft_file is None or event.payload.get("restart"):
+                    if draft_file is None:
+                        print(f"[{event.progress}%] ✍️ Streaming draft to {draft_path}...")
+                    else:
+                        draft_file.close()
+                    draft_file = open(draft_path, "w", encoding="utf-8")
+                draft_file.write(event.message)
+                draft_file.flush()
             elif event.type == "log":
                 logger.info(event.message)
             elif event.type == "error":
@@ -44,11 +57,15 @@ def main():
     except KeyboardInterrupt:
         print("\n🛑 Operation cancelled by user.")
         sys.exit(130)
+    finally:
+        if draft_file is not None:
+            draft_file.close()
 
-    # 3. Output
+    # 3. Output (the final README goes through the draft file, then replaces the output at once)
     if final_result:
-        with open(args.output, "w", encoding="utf-8") as f:
+        with open(draft_path, "w", encoding="utf-8") as f:
             f.write(final_result['markdown'])
+        os.replace(draft_path, args.output)
             
         logger.info(f"Success! README generated at {args.output}")
 
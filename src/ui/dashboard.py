@@ -66,6 +66,10 @@ def render_dashboard():
             # Narrative Status Updates
             with st.status(f"🚀 Spinning up the team... (Brain: {config.MODEL_PLANNER})", expanded=True) as status:
                 prog_bar = st.progress(0)
+                # Live preview of the draft while the Writer streams it
+                preview = st.empty()
+                draft_text = ""
+                last_render = 0.0
                 
                 workflow = ReadmeWorkflow()
                 final_result = None
@@ -73,10 +77,21 @@ def render_dashboard():
                 # --- Execute Workflow ---
                 for event in workflow.run(repo_url, custom_focus, token_budget):
                     if event.type == "status":
+                        if draft_text:
+                            preview.markdown(draft_text)
                         st.write(event.message)
                         status.update(label=f"🔄 {event.message}")
                         prog_bar.progress(event.progress / 100)
                     
+                    elif event.type == "token":
+                        if event.payload.get("restart"):
+                            draft_text = ""
+                        draft_text += event.message
+                        # Re-rendering markdown per token is slow; a few times a second is enough
+                        if time.time() - last_render > 0.25:
+                            preview.markdown(draft_text)
+                            last_render = time.time()
+                    
                     elif event.type == "log":
                         st.caption(f"ℹ️ {event.message}")
                         
@@ -87,6 +102,7 @@ def render_dashboard():
                         
                     elif event.type == "result":
                         final_result = event.payload
+                        preview.empty()
                         prog_bar.progress(1.0)
                         status.update(label=f"🎉 All done! Documentation generated in {event.payload['duration']:.1f}s", state="complete", expanded=False)
 
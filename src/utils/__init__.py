@@ -1,13 +1,20 @@
 """Utility modules for shared functionality."""
-from .token_utils import count_tokens, truncate_tokens
+from .token_utils import count_tokens, truncate_tokens, truncate_tokens_with_count
 from .file_utils import safe_read_file, safe_write_file, ensure_directory, file_exists, is_text_file
+from .cache_utils import DiskCache, hash_key, git_blob_id
+from .timing_utils import PhaseTimer
 
 __all__ = [
     'count_tokens',
     'truncate_tokens',
+    'truncate_tokens_with_count',
     'safe_read_file',
     'safe_write_file',
     'ensure_directory',
     'file_exists',
     'is_text_file',
+    'DiskCache',
+    'hash_key',
+    'git_blob_id',
+    'PhaseTimer',
 ]
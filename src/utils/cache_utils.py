@@ -0,0 +1,187 @@
+"""
+Shared on-disk cache utilities.
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(*parts: str) -> str:
+    """Build a stable cache key from several string parts."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def git_blob_id(data: bytes) -> str:
+    """
+    Compute the git blob SHA-1 of raw file content.
+
+    Matches `git hash-object`, so keys computed from disk content line up
+    with the blob ids reported by `git ls-files -s`.
+    """
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Content-addressed key/value store on disk with size-capped eviction.
+
+    Entries are sharded into two-character subdirectories (like git objects),
+    written atomically, and evicted least-recently-used first once the total
+    size exceeds `max_bytes`. With `max_age` (seconds), entries written longer
+    ago than that are misses and go first on prune.
+
+    An entry's mtime is when it was written; its atime when it was last used.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024, max_age: Optional[float] = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        # Counters are shared by the threads reading the cache
+        self._lock = threading.Lock()
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.enabled = True
+        except Exception as e:
+            logger.warning(f"Cache disabled, could not create {cache_dir}: {e}")
+            self.enabled = False
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key[2:]
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            now = time.time()
+            written = os.stat(path).st_mtime
+            if self._expired(written, now):
+                path.unlink()
+                self._count(hit=False)
+                return None
+            # Refresh atime (keeping mtime) so eviction is least-recently-used
+            os.utime(path, (now, written))
+            self._count(hit=True)
+            return value
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"Cache read failed for {key}: {e}")
+        self._count(hit=False)
+        return None
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key: str, value: str) -> bool:
+        """Store a value atomically. Returns True on success."""
+        if not self.enabled:
+            return False
+        path = self._path(key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.debug(f"Cache write failed for {key}: {e}")
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return False
+
+    def _expired(self, written: float, now: float) -> bool:
+        return self.max_age is not None and now - written > self.max_age
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        now = time.time()
+        for shard in self.cache_dir.iterdir():
+            if not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                try:
+                    st = entry.stat()
+                    if self._expired(st.st_mtime, now):
+                        # Expired: evicted first, as if never used
+                        entries.append((0.0, st.st_size, entry))
+                    else:
+                        entries.append((st.st_atime, st.st_size, entry))
+                except OSError:
+                    continue
+        return entries
+
+    def prune(self) -> int:
+        """
+        Evict expired entries, then least-recently-used ones until the cache
+        fits in `max_bytes`. Evicts down to 90% of the cap so pruning doesn't
+        run on every call.
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.enabled:
+            return 0
+        try:
+            entries = self._entries()
+        except Exception as e:
+            logger.debug(f"Cache prune failed: {e}")
+            return 0
+
+        total = sum(size for _, size, _ in entries)
+        expired = any(used == 0.0 for used, _, _ in entries)
+        if total <= self.max_bytes and not expired:
+            return 0
+
+        # Under the cap, only the expired entries go
+        target = int(self.max_bytes * 0.9) if total > self.max_bytes else total
+        removed = 0
+        for used, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= target and used != 0.0:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        logger.info(f"Cache pruned: removed {removed} entries from {self.cache_dir}")
+        return removed
+
+    def clear(self):
+        """Remove every entry in the cache."""
+        if not self.enabled:
+            return
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                continue
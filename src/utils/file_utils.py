@@ -3,6 +3,7 @@ Shared file reading utilities with consistent error handling.
 """
 import os
 import logging
+from itertools import islice
 from typing import Optional, List
 from pathlib import Path
 
@@ -24,11 +25,8 @@ def safe_read_file(file_path: str, max_lines: Optional[int] = None, encoding: st
     try:
         with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
             if max_lines:
-                lines = [next(f) for _ in range(max_lines)]
-                return "".join(lines)
+                return "".join(islice(f, max_lines))
             return f.read()
-    except StopIteration:
-        return ""
     except Exception as e:
         logger.debug(f"Could not read {file_path}: {e}")
         return ""
@@ -0,0 +1,43 @@
+"""
+Lightweight per-phase timing shared by the analysis stages.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class PhaseTimer:
+    """
+    Accumulates seconds per named phase. Thread-safe, so phases that run in
+    worker threads (parsing, tokenizing) add up their time across workers.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self._totals[phase] = self._totals.get(phase, 0.0) + seconds
+
+    def merge(self, totals: Dict[str, float]):
+        """Adds totals measured elsewhere (e.g. in a worker process)."""
+        for phase, seconds in totals.items():
+            self.add(phase, seconds)
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._totals)
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
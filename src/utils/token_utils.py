@@ -2,7 +2,7 @@
 Shared token counting utilities.
 """
 import tiktoken
-from typing import Optional
+from typing import Optional, Tuple
 
 
 class TokenCounter:
@@ -34,24 +34,28 @@ class TokenCounter:
     
     def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
         """Truncate text to fit within token budget."""
+        return self.truncate_with_count(text, max_tokens)[0]
+    
+    def truncate_with_count(self, text: str, max_tokens: int) -> Tuple[str, int]:
+        """Truncate text to fit within token budget, also returning its token count."""
         if not text or max_tokens <= 0:
-            return ""
+            return "", 0
         
         if self._encoder:
             try:
                 tokens = self._encoder.encode(text, disallowed_special=())
                 if len(tokens) <= max_tokens:
-                    return text
+                    return text, len(tokens)
                 truncated_tokens = tokens[:max_tokens]
-                return self._encoder.decode(truncated_tokens)
+                return self._encoder.decode(truncated_tokens), max_tokens
             except Exception:
                 pass
         
         # Fallback: character-based truncation
         max_chars = max_tokens * 4
         if len(text) <= max_chars:
-            return text
-        return text[:max_chars] + "\n... [TRUNCATED]"
+            return text, len(text) // 4
+        return text[:max_chars] + "\n... [TRUNCATED]", max_tokens
 
 
 # Singleton instance
@@ -66,3 +70,8 @@ def count_tokens(text: str) -> int:
 def truncate_tokens(text: str, max_tokens: int) -> str:
     """Quick truncation using default encoder."""
     return _default_counter.truncate_to_tokens(text, max_tokens)
+
+
+def truncate_tokens_with_count(text: str, max_tokens: int) -> Tuple[str, int]:
+    """Truncation that also returns the token count of the result (one encode)."""
+    return _default_counter.truncate_with_count(text, max_tokens)